@@ -0,0 +1,3 @@
+"""
+Benchmarks package - headless performance measurements
+""" 
\ No newline at end of file
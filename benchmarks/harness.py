@@ -0,0 +1,154 @@
+"""
+Benchmark harness - times registered cases and compares the results with JSON baselines
+"""
+
+import gc
+import json
+import platform
+import statistics
+import time
+
+# Registered benchmarks by name: (setup, args); setup(*args) returns the function to time
+BENCHMARKS = {}
+
+def register(name, setup, *args):
+    """Add a benchmark - setup(*args) builds the state and returns a function to call repeatedly
+    (or a (function, info) pair, with info describing the case, e.g. a particle count)"""
+    BENCHMARKS[name] = (setup, args)
+
+def time_loops(function, loops):
+    """Seconds taken by calling function loops times"""
+    start = time.perf_counter()
+    for _ in range(loops):
+        function()
+    return time.perf_counter() - start
+
+def calibrate(function, min_time=0.02):
+    """Loop count that makes timing function take at least min_time (doubling also warms caches up)"""
+    loops = 1
+    while time_loops(function, loops) < min_time:
+        loops *= 2
+    return loops
+
+def statistics_of(times, loops):
+    """Summary of the per-call times from each repeat"""
+    return {
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "min": min(times),
+        "max": max(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "loops": loops,
+        "repeat": len(times),
+    }
+
+def machine_info():
+    """Describe where results were measured, since baselines only compare on the same machine"""
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    import pygame
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "pygame": pygame.version.ver,
+        "numpy": numpy_version,
+    }
+
+def run(names, repeat=10, min_time=0.02, report=print):
+    """Run benchmarks by name and return the results document
+    
+    Repeats go round-robin over all benchmarks rather than back to back, so a slow spell on
+    a shared machine hits one repeat of many benchmarks instead of every repeat of one."""
+    cases = []
+    for name in names:
+        setup, args = BENCHMARKS[name]
+        prepared = setup(*args)
+        function, info = prepared if isinstance(prepared, tuple) else (prepared, None)
+        cases.append((name, function, info, calibrate(function, min_time), []))
+    
+    # Collections would land in random repeats - timeit turns them off too
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            for name, function, info, loops, times in cases:
+                times.append(time_loops(function, loops) / loops)
+    finally:
+        gc.enable()
+    
+    results = {}
+    for name, function, info, loops, times in cases:
+        result = results[name] = statistics_of(times, loops)
+        if info:
+            result["info"] = info
+        report(f"{name:40} {format_time(result['min']):>10}  "
+               f"(median {format_time(result['median'])}, {loops} loops x {repeat})")
+    
+    return {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "machine": machine_info(),
+        "results": results,
+    }
+
+def format_time(seconds):
+    """Human-readable duration of one call"""
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+def save(document, path):
+    """Write a results document"""
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+
+def load(path):
+    """Read a results document"""
+    with open(path) as f:
+        return json.load(f)
+
+def slowest(result):
+    """Per-call time of a result's slowest repeat (estimated for results saved without it)"""
+    return result.get("max", result["median"] + 2 * result["stdev"])
+
+def compare(baseline, current, threshold=0.3, report=print):
+    """Report per-benchmark changes and return the names that got slower than threshold
+    
+    Runs are compared by their fastest repeat, which is the least disturbed by whatever
+    else the machine was doing (the same reasoning as timeit's). A change only counts once it
+    is also outside the runs' spread - the slower run's fastest repeat has to be slower than
+    every repeat of the other run - so benchmarks with few, noisy loops don't cry wolf."""
+    if baseline["machine"] != current["machine"]:
+        report("Note: baseline was measured on a different machine or environment - expect drift")
+    
+    regressions = []
+    base_results, current_results = baseline["results"], current["results"]
+    for name in sorted(set(base_results) | set(current_results)):
+        if name not in current_results:
+            report(f"{name:40} {'':>10}  {'':>10}  not run")
+            continue
+        if name not in base_results:
+            report(f"{name:40} {'':>10}  {format_time(current_results[name]['min']):>10}  new")
+            continue
+        
+        before, after = base_results[name]["min"], current_results[name]["min"]
+        change = after / before - 1
+        if change > threshold and after > slowest(base_results[name]):
+            verdict = "REGRESSION"
+            regressions.append(name)
+        elif change < -threshold and slowest(current_results[name]) < before:
+            verdict = "faster"
+        elif abs(change) > threshold:
+            verdict = "ok (within noise)"
+        else:
+            verdict = "ok"
+        report(f"{name:40} {format_time(before):>10}  {format_time(after):>10}  {change:+7.1%}  {verdict}")
+    
+    report(f"{len(regressions)} regression(s) beyond {threshold:.0%}" if regressions
+           else f"No regressions beyond {threshold:.0%}")
+    return regressions 
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""
+Render mode benchmark - full-frame flip versus dirty-rect updates
+
+Run with: python -m benchmarks.render_modes
+"""
+
+import os
+import time
+
+# Headless SDL drivers unless the caller picked real ones
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from game.core import Game
+from game.engine import SimulationEngine
+from utils.settings import Settings
+
+def measure(dirty_rects, frames=600):
+    """Play frames of a running game and return (fps, cpu ms per frame)"""
+    settings = Settings(debug_output=False)
+    settings.dirty_rects = dirty_rects
+    
+    game = Game(settings)
+    game.game_state = "PLAYING"
+    
+    # Same seeded, tick-timed game for both modes
+    game.engine = SimulationEngine(settings, seed=1)
+    
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for _ in range(frames):
+        game.update()
+        game.render()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    
+    return frames / wall, cpu * 1000 / frames
+
+def main():
+    for dirty_rects in (False, True):
+        fps, cpu_ms = measure(dirty_rects)
+        mode = "dirty rects" if dirty_rects else "full frame"
+        print(f"{mode:12} {fps:8.0f} fps  {cpu_ms:6.3f} ms CPU/frame")
+
+if __name__ == "__main__":
+    main() 
\ No newline at end of file
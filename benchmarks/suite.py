@@ -0,0 +1,324 @@
+"""
+Benchmark suite - simulation, rendering, startup assets and score I/O, run headless
+
+    python -m benchmarks.suite run                      # print timings
+    python -m benchmarks.suite run -k render --out new.json
+    python -m benchmarks.suite run --save-baseline      # refresh benchmarks/baseline.json
+    python -m benchmarks.suite run --compare            # flag regressions against the baseline
+    python -m benchmarks.suite compare old.json new.json
+"""
+
+import argparse
+import fnmatch
+import itertools
+import os
+import random
+import tempfile
+
+# Headless SDL drivers unless the caller picked real ones
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+from benchmarks.harness import BENCHMARKS, register, run, compare, save, load
+from utils.settings import Settings
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+def make_settings(world_width=None, world_height=None):
+    """Quiet settings, optionally with a world larger than the window"""
+    settings = Settings(debug_output=False)
+    settings.world_width = world_width
+    settings.world_height = world_height
+    return settings
+
+def get_screen(settings):
+    """The dummy display surface"""
+    pygame.display.init()
+    return pygame.display.set_mode((settings.screen_width, settings.screen_height))
+
+def serpentine_turns(width, height):
+    """Direction to take from every cell to follow a cycle through the whole board
+    (right along even rows, left along odd ones; height must be even)"""
+    turns = {}
+    for y in range(height):
+        for x in range(width):
+            if y % 2 == 0:
+                turns[(x, y)] = "DOWN" if x == width - 1 else "RIGHT"
+            else:
+                turns[(x, y)] = "DOWN" if x == 0 else "LEFT"
+    return turns
+
+def make_snake(settings, length):
+    """A snake of length cells lying along the serpentine cycle, moving on every move() call
+    Returns (snake, turns) - steering by turns keeps it going forever without colliding"""
+    from game.snake import Snake
+    
+    snake = Snake(settings, clock=itertools.count().__next__)
+    turns = serpentine_turns(*settings.grid_dimensions())
+    
+    # Start the snake on the cycle, then grow it along it
+    for position in list(snake.body):
+        snake.remove_occupancy(position)
+    snake.body.clear()
+    snake.body.append((0, 0))
+    snake.add_occupancy((0, 0))
+    snake.direction = "RIGHT"
+    snake.growth_pending = length - 1
+    
+    for _ in range(length - 1):
+        snake.change_direction(turns[snake.body[0]])
+        snake.apply_pending_direction()
+        snake.step()
+    return snake, turns
+
+def setup_snake_move(length):
+    """One move along the cycle plus the self-collision check"""
+    settings = make_settings(100, 100)
+    snake, turns = make_snake(settings, length)
+    
+    def move():
+        snake.change_direction(turns[snake.body[0]])
+        snake.move()
+        snake.check_collision_with_self()
+    
+    return move
+
+def setup_food_respawn(occupancy):
+    """Placing food on the default board with a fraction of it covered by the snake"""
+    from game.food import Food
+    
+    settings = make_settings()
+    grid_width, grid_height = settings.grid_dimensions()
+    snake, _ = make_snake(settings, int(grid_width * grid_height * occupancy))
+    food = Food(settings, rng=random.Random(1))
+    
+    def respawn():
+        food.respawn(snake)
+    
+    return respawn, {"snake_length": len(snake.body)}
+
+def setup_render_snake(length):
+    """Drawing a snake half way between two cells"""
+    from ui.renderer import Renderer
+    
+    settings = make_settings()
+    renderer = Renderer(get_screen(settings), settings)
+    snake, turns = make_snake(settings, length)
+    snake.change_direction(turns[snake.body[0]])
+    snake.move()
+    
+    def render():
+        renderer.render_snake(snake, 0.5)
+        renderer.dirty_rects.clear()
+    
+    return render
+
+def setup_render_food(food_type):
+    """Drawing normal or (glowing) special food"""
+    from game.food import Food
+    from ui.renderer import Renderer
+    
+    settings = make_settings()
+    renderer = Renderer(get_screen(settings), settings)
+    food = Food(settings, rng=random.Random(1))
+    food.food_type = food_type
+    food.color = food.food_types[food_type]["color"]
+    
+    def render():
+        # Step through the pulse so glow sprites come from the cache like in a game
+        food.update_animation()
+        renderer.render_food(food)
+        renderer.dirty_rects.clear()
+    
+    return render
+
+def setup_render_explosion(extra_particles):
+    """Drawing the mushroom explosion at its busiest, optionally with more debris"""
+    from game.special_items import PowerUpEffects
+    
+    settings = make_settings()
+    now = [0.0]
+    effects = PowerUpEffects(settings, get_screen(settings), clock=lambda: now[0])
+    
+    # Play the explosion on a simulated clock and stop where it has the most particles
+    random.seed(1)
+    effects.activate_mushroom_power()
+    peak_tick = peak_count = 0
+    for tick in range(int(effects.explosion_duration * settings.fps)):
+        now[0] = tick / settings.fps
+        effects.update()
+        if len(effects.explosion_particles) > peak_count:
+            peak_tick, peak_count = tick, len(effects.explosion_particles)
+    
+    random.seed(1)
+    effects.activate_mushroom_power()
+    for tick in range(peak_tick + 1):
+        now[0] = tick / settings.fps
+        effects.update()
+    effects.add_explosion_particles(extra_particles)
+    
+    return effects.render_explosion, {"particles": len(effects.explosion_particles)}
+
+def setup_vignette(cached):
+    """Building the vignette overlay from scratch or from the disk cache"""
+    from ui.renderer import Renderer
+    
+    settings = make_settings()
+    renderer = Renderer(get_screen(settings), settings)
+    if cached:
+        renderer.create_vignette()  # Make sure the cache file exists
+        return renderer.create_vignette
+    
+    def create():
+        renderer.create_vignette_alpha(settings.screen_width, settings.screen_height, 0.7)
+    
+    return create
+
+def setup_tone_synthesis():
+    """Synthesizing every sound effect for a 44.1 kHz 16-bit stereo mixer"""
+    from ui.effects import Effects, TONES
+    
+    settings = make_settings()
+    effects = Effects(None, settings)
+    
+    def synthesize():
+        for tone in TONES.values():
+            effects.synthesize_tone(tone, 44100, -16, 2)
+    
+    return synthesize
+
+def setup_sound_startup():
+    """Starting the mixer and loading every sound effect (PCM from the disk cache)"""
+    from ui.effects import Effects
+    
+    settings = make_settings()
+    
+    def start():
+        effects = Effects(None, settings)
+        effects.get_sound_effects()
+        pygame.mixer.quit()
+    
+    start()  # Fill the PCM cache
+    return start
+
+def setup_scoreboard(backend, operation):
+    """Reading the high scores, recording a game, or storing a batch of 100 headless results,
+    with 10000 scores already stored (written in the foreground, so the store's cost is timed)"""
+    from utils.scoreboard import Scoreboard
+    
+    settings = make_settings()
+    settings.background_score_writes = False
+    settings.score_backend = backend
+    settings.score_file = os.path.join(tempfile.gettempdir(), f"snake_bench_scores.{backend}")
+    settings.legacy_score_file = None
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(settings.score_file + suffix):
+            os.remove(settings.score_file + suffix)
+    
+    rng = random.Random(1)
+    scoreboard = Scoreboard(settings)
+    scoreboard.store.add_many([(rng.randint(0, 5000), f"Player{i % 50}", "2025-01-01", "NORMAL")
+                               for i in range(10000)])
+    
+    if operation == "load":
+        return scoreboard.load_high_scores
+    
+    if operation == "add":
+        def add():
+            scoreboard.score = rng.randint(0, 5000)
+            scoreboard.add_high_score("Bench")
+        return add
+    
+    batch = [(rng.randint(0, 5000), "Bench", "2025-01-01", "NORMAL") for _ in range(100)]
+    return lambda: scoreboard.store.add_many(batch)
+
+def setup_leaderboard(operation):
+    """Ranking a score among 100000 recorded games, or recording one more"""
+    from utils.leaderboard import Leaderboard
+    
+    rng = random.Random(1)
+    leaderboard = Leaderboard((rng.randint(0, 5000), f"Player{i % 50}", "2025-01-01",
+                               rng.choice(("EASY", "NORMAL", "HARD"))) for i in range(100000))
+    
+    if operation == "rank":
+        def rank():
+            score = rng.randint(0, 5000)
+            leaderboard.rank(score, "NORMAL")
+            leaderboard.percentile(score, "NORMAL")
+        return rank
+    
+    return lambda: leaderboard.add((rng.randint(0, 5000), "Bench", "2025-01-01", "NORMAL"))
+
+for length in (10, 100, 1000, 5000):
+    register(f"snake.move/length={length}", setup_snake_move, length)
+for occupancy in (0.5, 0.9, 0.99):
+    register(f"food.respawn/occupancy={occupancy:.0%}", setup_food_respawn, occupancy)
+for length in (10, 100, 500):
+    register(f"render.snake/length={length}", setup_render_snake, length)
+for food_type in ("normal", "special"):
+    register(f"render.food/{food_type}", setup_render_food, food_type)
+register("render.explosion/peak", setup_render_explosion, 0)
+register("render.explosion/peak+1000", setup_render_explosion, 1000)
+register("startup.vignette/generate", setup_vignette, False)
+register("startup.vignette/cached", setup_vignette, True)
+register("startup.tones/synthesize", setup_tone_synthesis)
+register("startup.sound/mixer+cached", setup_sound_startup)
+for backend in ("sqlite", "log"):
+    register(f"scoreboard/{backend}/load", setup_scoreboard, backend, "load")
+    register(f"scoreboard/{backend}/add_high_score", setup_scoreboard, backend, "add")
+    register(f"scoreboard/{backend}/add_many(100)", setup_scoreboard, backend, "add_many")
+register("leaderboard/rank+percentile", setup_leaderboard, "rank")
+register("leaderboard/add", setup_leaderboard, "add")
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    run_parser = commands.add_parser("run", help="run benchmarks")
+    run_parser.add_argument("-k", dest="patterns", action="append",
+                            help="only benchmarks whose name matches a glob or contains the text")
+    run_parser.add_argument("--repeat", type=int, default=10, help="timed repeats per benchmark")
+    run_parser.add_argument("--min-time", type=float, default=0.02, help="seconds per repeat")
+    run_parser.add_argument("--out", help="write results to a JSON file")
+    run_parser.add_argument("--save-baseline", action="store_true", help=f"write results to {BASELINE}")
+    run_parser.add_argument("--compare", nargs="?", const=BASELINE, help="compare with a baseline file")
+    run_parser.add_argument("--threshold", type=float, default=0.3, help="slowdown that counts as a regression")
+    
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.3)
+    
+    args = parser.parse_args()
+    
+    if args.command == "compare":
+        regressions = compare(load(args.baseline), load(args.current), args.threshold)
+        raise SystemExit(1 if regressions else 0)
+    
+    names = [name for name in BENCHMARKS
+             if not args.patterns or any(fnmatch.fnmatch(name, pattern) or pattern in name
+                                         for pattern in args.patterns)]
+    document = run(names, args.repeat, args.min_time)
+    
+    if args.out:
+        save(document, args.out)
+    
+    # Compare before a new baseline replaces the old one
+    regressions = []
+    if args.compare:
+        print()
+        regressions = compare(load(args.compare), document, args.threshold)
+    
+    if args.save_baseline:
+        # A partial run only replaces its own entries; cases that no longer exist are dropped
+        if args.patterns and os.path.exists(BASELINE):
+            results = {name: result for name, result in load(BASELINE)["results"].items() if name in BENCHMARKS}
+            results.update(document["results"])
+            document = dict(document, results=results)
+        save(document, BASELINE)
+    
+    raise SystemExit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main() 
\ No newline at end of file
@@ -0,0 +1,230 @@
+"""
+Autopilot - an agent that steers the snake to food with A* on the wrap-around grid
+"""
+
+import argparse
+import heapq
+import time
+from collections import deque
+
+class Autopilot:
+    def __init__(self, settings):
+        self.grid_width, self.grid_height = settings.grid_dimensions()
+        
+        # Planned cells, reused across ticks until the food moves or the plan runs out
+        self.path = deque()
+        self.plan_food = None
+        self.expected_head = None
+        self.steps_left = 0
+        
+        # Moves to follow the tail before looking for a safe way to the food again
+        self.food_retry_moves = 4
+        self.food_wait = 0
+        
+        # Head the last decision was made for - the snake only needs one per cell
+        self.decided_head = None
+        
+        # Statistics for soak tests and benchmarks
+        self.decisions = 0
+        self.searches = 0
+        self.search_time = 0.0
+    
+    def __call__(self, engine):
+        """Controller for SimulationEngine.run - a direction when the snake reaches a new cell"""
+        snake = engine.snake
+        head = snake.body[0]
+        if head == self.decided_head:
+            return None
+        self.decided_head = head
+        self.decisions += 1
+        
+        next_cell = self.next_cell(snake, engine.food.position)
+        return self.direction_to(head, next_cell) if next_cell else None
+    
+    def next_cell(self, snake, food):
+        """Pick the next cell: along a safe path to the food, else towards the tail, else into open space"""
+        head = snake.body[0]
+        
+        # Keep following the previous plan while the food hasn't moved (eating changes the timing)
+        if self.path and self.steps_left and food == self.plan_food and head == self.expected_head:
+            return self.advance()
+        if food != self.plan_food:
+            self.food_wait = 0
+        
+        if food is not None and not self.food_wait:
+            path = self.search(snake.body, snake.growth_pending, head, food)
+            if path and self.is_safe(snake.body, snake.growth_pending, path):
+                return self.follow(path, food, len(path))
+            self.food_wait = self.food_retry_moves
+        
+        # No safe way to the food yet: chase the tail, which always keeps an escape route open.
+        # The tail moves on every step, so this is planned afresh each move
+        self.food_wait = max(0, self.food_wait - 1)
+        path = self.search(snake.body, snake.growth_pending, head, snake.body[-1])
+        if path:
+            return self.follow(path, food, 1)
+        
+        self.path.clear()
+        return self.roomiest_neighbor(snake.body)
+    
+    def follow(self, path, food, steps):
+        """Start a new plan along path for up to steps moves"""
+        self.path = deque(path)
+        self.plan_food = food
+        self.steps_left = steps
+        return self.advance()
+    
+    def advance(self):
+        """Take the next cell of the plan"""
+        cell = self.path.popleft()
+        self.expected_head = cell
+        self.steps_left -= 1
+        return cell
+    
+    def neighbors(self, cell):
+        """The four cells next to a cell, wrapping around the edges"""
+        x, y = cell
+        width, height = self.grid_width, self.grid_height
+        return (
+            (x, (y - 1) % height),
+            (x, (y + 1) % height),
+            ((x - 1) % width, y),
+            ((x + 1) % width, y),
+        )
+    
+    def direction_to(self, cell, next_cell):
+        """Direction name for a step between neighboring cells"""
+        dx = (next_cell[0] - cell[0]) % self.grid_width
+        dy = (next_cell[1] - cell[1]) % self.grid_height
+        if dx == 1:
+            return "RIGHT"
+        if dx == self.grid_width - 1:
+            return "LEFT"
+        if dy == 1:
+            return "DOWN"
+        return "UP"
+    
+    def distance(self, a, b):
+        """Manhattan distance on the torus - the A* heuristic"""
+        dx = abs(a[0] - b[0])
+        dy = abs(a[1] - b[1])
+        return min(dx, self.grid_width - dx) + min(dy, self.grid_height - dy)
+    
+    def free_times(self, body, growth_pending):
+        """Moves until each body cell is vacated (the tail goes first unless the snake is growing)"""
+        length = len(body)
+        return {cell: length - i + growth_pending for i, cell in enumerate(body)}
+    
+    def search(self, body, growth_pending, start, goal):
+        """A* from start to goal, allowing cells the body will have left by the time they're reached"""
+        started = time.perf_counter()
+        self.searches += 1
+        
+        busy_until = self.free_times(body, growth_pending)
+        width, height = self.grid_width, self.grid_height
+        goal_x, goal_y = goal
+        came_from = {start: None}
+        cost = {start: 0}
+        frontier = [(self.distance(start, goal), 0, start)]
+        found = False
+        
+        # Hot loop - neighbors and the heuristic are inlined
+        while frontier:
+            _, steps, cell = heapq.heappop(frontier)
+            if cell == goal:
+                found = True
+                break
+            if steps > cost[cell]:
+                continue
+            
+            steps += 1
+            x, y = cell
+            for neighbor in ((x, (y - 1) % height), (x, (y + 1) % height),
+                             ((x - 1) % width, y), ((x + 1) % width, y)):
+                if busy_until.get(neighbor, 0) > steps or steps >= cost.get(neighbor, steps + 1):
+                    continue
+                cost[neighbor] = steps
+                came_from[neighbor] = cell
+                
+                dx = abs(neighbor[0] - goal_x)
+                dy = abs(neighbor[1] - goal_y)
+                estimate = steps + min(dx, width - dx) + min(dy, height - dy)
+                heapq.heappush(frontier, (estimate, steps, neighbor))
+        
+        path = None
+        if found:
+            path = []
+            cell = goal
+            while cell != start:
+                path.append(cell)
+                cell = came_from[cell]
+            path.reverse()
+        
+        self.search_time += time.perf_counter() - started
+        return path
+    
+    def is_safe(self, body, growth_pending, path):
+        """Check that after eating at the end of path the snake can still reach its own tail"""
+        # Body after following the path: the path becomes the front, the old body shifts back
+        growth = min(growth_pending, len(path))
+        length = len(body) + growth
+        future_body = (list(reversed(path)) + list(body))[:length]
+        
+        # Eating adds one more segment
+        future_growth = growth_pending - growth + 1
+        return self.search(future_body, future_growth, future_body[0], future_body[-1]) is not None
+    
+    def roomiest_neighbor(self, body):
+        """Last resort: the free neighboring cell with the most space reachable from it"""
+        blocked = set(body)
+        best, best_room = None, -1
+        for start in self.neighbors(body[0]):
+            if start in blocked:
+                continue
+            
+            # Flood fill from the neighbor, counting cells
+            seen = {start}
+            queue = deque([start])
+            while queue:
+                for neighbor in self.neighbors(queue.popleft()):
+                    if neighbor not in seen and neighbor not in blocked:
+                        seen.add(neighbor)
+                        queue.append(neighbor)
+            
+            if len(seen) > best_room:
+                best, best_room = start, len(seen)
+        return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak test the autopilot on headless games")
+    parser.add_argument("--games", type=int, default=20, help="games to play")
+    parser.add_argument("--ticks", type=int, default=200000, help="tick limit per game")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    args = parser.parse_args()
+    
+    from utils.settings import Settings
+    from game.engine import SimulationEngine
+    settings = Settings(debug_output=False)
+    
+    total_ticks = total_decisions = total_searches = 0
+    total_search_time = 0.0
+    start = time.perf_counter()
+    for seed in range(args.seed, args.seed + args.games):
+        engine = SimulationEngine(settings, seed=seed)
+        autopilot = Autopilot(settings)
+        score = engine.run(args.ticks, autopilot)
+        
+        outcome = "board full" if engine.food.position is None else "crashed" if engine.game_over else "timed out"
+        print(f"seed {seed}: score {score}, length {len(engine.snake.body)}, {engine.tick} ticks, {outcome}")
+        
+        total_ticks += engine.tick
+        total_decisions += autopilot.decisions
+        total_searches += autopilot.searches
+        total_search_time += autopilot.search_time
+    
+    elapsed = time.perf_counter() - start
+    print(f"{total_ticks / elapsed:.0f} ticks/s, {total_decisions / elapsed:.0f} decisions/s, "
+          f"{total_search_time / max(total_searches, 1) * 1e6:.0f} us per search")
+
+if __name__ == "__main__":
+    main() 
\ No newline at end of file
@@ -0,0 +1,253 @@
+"""
+Batch simulator - steps many independent headless games at once with NumPy
+
+Every game follows the same rules as SimulationEngine (wrap-around movement,
+growth, speed increase, food placement from the free-cell index) and draws
+food from its own random.Random(seed), so a game here ends with the same
+score and tick count as the scalar engine given the same seed and inputs.
+Mario is not simulated, so parity holds with settings.mario_enabled off.
+Requires NumPy.
+"""
+
+import argparse
+import random
+import time
+import numpy as np
+
+# Direction codes used by the batch arrays, in clockwise order
+DIRECTIONS = ("UP", "RIGHT", "DOWN", "LEFT")
+DIRECTION_DX = np.array([0, 1, 0, -1])
+DIRECTION_DY = np.array([-1, 0, 1, 0])
+NO_DIRECTION = -1
+
+def scheduled_turns(seeds, tick):
+    """Deterministic turn requests per game - usable by both batch and scalar runs"""
+    mixed = (np.asarray(seeds, dtype=np.int64) * 7919 + tick * 104729) % 9973
+    return np.where(mixed % 23 == 0, mixed % 4, NO_DIRECTION)
+
+class BatchSimulator:
+    def __init__(self, settings, seeds):
+        self.settings = settings
+        self.seeds = np.asarray(seeds, dtype=np.int64)
+        self.num_games = len(self.seeds)
+        
+        # Board dimensions, cells are numbered y * grid_width + x
+        self.grid_width, self.grid_height = settings.grid_dimensions()
+        self.cell_count = self.grid_width * self.grid_height
+        self.index_dtype = np.int16 if self.cell_count < 2**15 else np.int32
+        
+        # Timing and growth rules
+        self.tick_rate = settings.fps
+        self.speed_factor = 1.0 + settings.speed_increase_rate
+        
+        self.reset()
+    
+    def reset(self):
+        """Start every game from the same position the scalar engine uses"""
+        n, cells = self.num_games, self.cell_count
+        games = np.arange(n)
+        self.tick = 0
+        self.elapsed = 0.0
+        
+        # Per-game state
+        self.alive = np.ones(n, dtype=bool)
+        self.final_tick = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.speed = np.full(n, float(self.settings.initial_snake_speed))
+        self.last_move_time = np.zeros(n)
+        self.direction = np.full(n, DIRECTIONS.index("RIGHT"), dtype=np.int8)
+        self.pending_direction = np.full(n, NO_DIRECTION, dtype=np.int8)
+        self.growth_pending = np.zeros(n, dtype=np.int64)
+        
+        # Ring-buffer bodies: head at head_index, then length segments towards the tail
+        self.body = np.zeros((n, cells + 1), dtype=self.index_dtype)
+        self.head_index = np.zeros(n, dtype=np.int64)
+        self.length = np.zeros(n, dtype=np.int64)
+        
+        # Occupancy counts and the free-cell index (packed cells + slot of each cell)
+        self.occupancy = np.zeros((n, cells), dtype=np.uint8)
+        self.free_cells = np.tile(np.arange(cells, dtype=self.index_dtype), (n, 1))
+        self.free_slots = np.tile(np.arange(cells, dtype=self.index_dtype), (n, 1))
+        self.free_count = np.full(n, cells, dtype=np.int64)
+        
+        # Initial snake (3 segments), laid out head first like Snake.__init__
+        mid_x, mid_y = self.grid_width // 2, self.grid_height // 2
+        for offset in range(3):
+            cell = mid_y * self.grid_width + mid_x - offset
+            self.body[:, offset] = cell
+            self.length += 1
+            self.occupy(games, np.full(n, cell))
+        
+        # Food, drawn from each game's own RNG in the same order as Food and the engine
+        self.rngs = [random.Random(int(seed)) for seed in self.seeds]
+        self.food = np.zeros(n, dtype=np.int64)
+        for game, rng in enumerate(self.rngs):
+            # Food.__init__ places food ignoring the snake, then reset respawns it
+            rng.random()
+            rng.randint(0, self.grid_width - 1)
+            rng.randint(0, self.grid_height - 1)
+            self.respawn_food(game)
+    
+    def occupy(self, games, cells):
+        """Add one segment to each cell, taking newly covered cells out of the free index"""
+        newly_taken = self.occupancy[games, cells] == 0
+        self.occupancy[games, cells] += 1
+        games, cells = games[newly_taken], cells[newly_taken]
+        
+        # Swap-remove: the last free cell moves into the taken cell's slot
+        slots = self.free_slots[games, cells].astype(np.int64)
+        self.free_count[games] -= 1
+        last = self.free_cells[games, self.free_count[games]]
+        self.free_cells[games, slots] = last
+        self.free_slots[games, last] = slots
+        self.free_slots[games, cells] = -1
+    
+    def vacate(self, games, cells):
+        """Remove one segment from each cell, returning emptied cells to the free index"""
+        self.occupancy[games, cells] -= 1
+        emptied = self.occupancy[games, cells] == 0
+        games, cells = games[emptied], cells[emptied]
+        
+        self.free_slots[games, cells] = self.free_count[games]
+        self.free_cells[games, self.free_count[games]] = cells
+        self.free_count[games] += 1
+    
+    def respawn_food(self, game):
+        """Place food for one game; False if its board is full"""
+        rng = self.rngs[game]
+        rng.random()  # Food type roll - does not change the score
+        count = int(self.free_count[game])
+        if not count:
+            self.food[game] = -1
+            return False
+        self.food[game] = self.free_cells[game, rng.randrange(count)]
+        return True
+    
+    def change_direction(self, requested):
+        """Queue direction codes per game (NO_DIRECTION to skip), like Snake.change_direction"""
+        requested = np.asarray(requested)
+        valid = self.alive & (requested != NO_DIRECTION) & (requested != (self.direction + 2) % 4)
+        self.pending_direction[valid] = requested[valid]
+    
+    def step(self):
+        """Advance every running game by one tick"""
+        self.tick += 1
+        
+        # Apply any pending direction change
+        queued = self.alive & (self.pending_direction != NO_DIRECTION)
+        self.direction[queued] = self.pending_direction[queued]
+        self.pending_direction[queued] = NO_DIRECTION
+        
+        # Only games whose move interval has elapsed take a step
+        current_time = self.tick / self.tick_rate
+        ready = self.alive & ~(current_time - self.last_move_time < 1.0 / self.speed)
+        games = np.flatnonzero(ready)
+        if not len(games):
+            return
+        self.last_move_time[games] = current_time
+        
+        # New head with wrap-around at the board edges
+        head = self.body[games, self.head_index[games]].astype(np.int64)
+        direction = self.direction[games]
+        new_x = (head % self.grid_width + DIRECTION_DX[direction]) % self.grid_width
+        new_y = (head // self.grid_width + DIRECTION_DY[direction]) % self.grid_height
+        new_head = new_y * self.grid_width + new_x
+        
+        capacity = self.body.shape[1]
+        self.head_index[games] = (self.head_index[games] - 1) % capacity
+        self.body[games, self.head_index[games]] = new_head
+        self.length[games] += 1
+        self.occupy(games, new_head)
+        
+        # Remove tail if not growing
+        growing = self.growth_pending[games] > 0
+        self.growth_pending[games[growing]] -= 1
+        shrinking = games[~growing]
+        self.length[shrinking] -= 1
+        tail_index = (self.head_index[shrinking] + self.length[shrinking]) % capacity
+        self.vacate(shrinking, self.body[shrinking, tail_index].astype(np.int64))
+        
+        # Self collision ends the game
+        collided = self.occupancy[games, new_head] > 1
+        self.end_games(games[collided])
+        
+        # Eating food: grow, score, respawn and speed up
+        eating = ~collided & (new_head == self.food[games])
+        eaters = games[eating]
+        self.growth_pending[eaters] += 1
+        self.score[eaters] += 10
+        for game in eaters:
+            if self.respawn_food(game):
+                self.speed[game] = min(self.speed[game] * self.speed_factor, self.settings.max_snake_speed)
+            else:
+                self.end_games(np.array([game]))
+    
+    def end_games(self, games):
+        """Mark games as over at the current tick"""
+        self.alive[games] = False
+        self.final_tick[games] = self.tick
+    
+    def run(self, max_ticks, controller=None):
+        """Run until every game is over or max_ticks; controller(sim) returns direction codes"""
+        start = time.perf_counter()
+        while self.tick < max_ticks and self.alive.any():
+            if controller:
+                self.change_direction(controller(self))
+            self.step()
+        self.final_tick[self.alive] = self.tick
+        self.elapsed += time.perf_counter() - start
+        return self.score
+    
+    def games_per_second(self):
+        """Throughput of the last run"""
+        return self.num_games / self.elapsed if self.elapsed else 0.0
+
+def run_scalar(settings, seed, max_ticks):
+    """Play one game on SimulationEngine with the scheduled turns, for parity checks"""
+    from game.engine import SimulationEngine
+    
+    def controller(engine):
+        code = int(scheduled_turns([seed], engine.tick)[0])
+        return DIRECTIONS[code] if code != NO_DIRECTION else None
+    
+    engine = SimulationEngine(settings, seed=seed)
+    score = engine.run(max_ticks, controller)
+    return score, engine.tick
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless snake games in bulk")
+    parser.add_argument("--games", type=int, default=10000, help="games per difficulty")
+    parser.add_argument("--ticks", type=int, default=20000, help="tick limit per game")
+    parser.add_argument("--check", type=int, default=0, help="games to verify against the scalar engine")
+    args = parser.parse_args()
+    
+    from utils.settings import Settings
+    settings = Settings(debug_output=False)
+    settings.mario_enabled = False
+    
+    for difficulty in settings.difficulty_settings:
+        settings.change_difficulty(difficulty)
+        seeds = np.arange(args.games)
+        sim = BatchSimulator(settings, seeds)
+        
+        def controller(sim):
+            return scheduled_turns(sim.seeds, sim.tick)
+        
+        scores = sim.run(args.ticks, controller)
+        print(f"{difficulty}: {sim.games_per_second():.0f} games/s, "
+              f"mean score {scores.mean():.1f}, max score {scores.max()}, "
+              f"mean survival {sim.final_tick.mean():.0f} ticks")
+        
+        # Compare a sample of games with the scalar engine
+        for seed in seeds[:args.check]:
+            expected = run_scalar(settings, int(seed), args.ticks)
+            actual = (int(sim.score[seed]), int(sim.final_tick[seed]))
+            if expected != actual:
+                print(f"  seed {seed}: engine {expected} != batch {actual}")
+                break
+        else:
+            if args.check:
+                print(f"  {min(args.check, len(seeds))} games match the scalar engine")
+
+if __name__ == "__main__":
+    main() 
\ No newline at end of file
@@ -2,21 +2,39 @@
 Core game logic and main game loop
 """
 
+import os
 import pygame
-import time
 import random
-from game.snake import Snake
-from game.food import Food
-from game.special_items import Mario, PowerUpEffects
+import time
+import threading
+from game.engine import SimulationEngine
+from game.replay import GAMEPLAY_SETTINGS, Replay
+from game.special_items import PowerUpEffects
 from ui.renderer import Renderer
 from ui.menu import Menu
 from ui.effects import Effects
+from ui.profile_overlay import ProfileOverlay
+from ui.text import text_cache
+from utils.game_config import RESTART_FIELDS, ConfigError, ConfigWatcher
+from utils.profiler import FrameProfiler, NullProfiler
 from utils.scoreboard import Scoreboard
 
+# Methods timed as frame stages when profiling - only top-level calls, so stages don't overlap
+GAME_STAGES = ("process_events", "update")
+RENDERER_STAGES = ("begin_frame", "render_grid", "render_food", "render_mario", "render_snake",
+                   "render_score", "render_pause_overlay", "render_game_over", "present")
+
+# Config fields that change the rules - a game in progress keeps the values it started with
+GAMEPLAY_FIELDS = frozenset(GAMEPLAY_SETTINGS) | {"difficulty_settings"}
+
 class Game:
-    def __init__(self, settings):
-        # Initialize pygame
-        pygame.init()
+    def __init__(self, settings, start_time=None):
+        # Startup timing, measured from start_time (e.g. when main() began)
+        self.startup_start = start_time or time.perf_counter()
+        self.startup_times = []
+        
+        # Initialize pygame - just the display; audio starts in the background later
+        pygame.display.init()
         pygame.display.set_caption("Advanced Snake Game")
         
         # Game components
@@ -25,31 +43,54 @@ class Game:
         self.running = True
         self.game_state = "MENU"  # MENU, PLAYING, PAUSED, GAME_OVER
         
-        # Initialize screen
-        self.screen = pygame.display.set_mode(
-            (settings.screen_width, settings.screen_height)
-        )
+        # Initialize screen (vsync needs a scaled display)
+        if settings.vsync:
+            self.screen = pygame.display.set_mode(
+                (settings.screen_width, settings.screen_height), pygame.SCALED, vsync=1
+            )
+        else:
+            self.screen = pygame.display.set_mode(
+                (settings.screen_width, settings.screen_height)
+            )
+        self.mark_startup("display")
         
-        # Initialize game objects
-        self.snake = Snake(settings)
-        self.food = Food(settings)
+        # Game logic runs in the headless engine; this class only adds display and sound
+        self.engine = SimulationEngine(settings)
+        self.replay_saved = False
         
         # Initialize special features
-        self.mario = Mario(settings)
-        self.power_up_effects = PowerUpEffects(settings, self.screen)
+        self.power_up_effects = PowerUpEffects(settings, self.screen, clock=self.engine.clock)
+        self.mark_startup("game objects")
         
-        # Initialize UI components
+        # Initialize UI components (heavy assets are deferred until preload_assets)
         self.renderer = Renderer(self.screen, settings)
         self.menu = Menu(self.screen, settings)
         self.effects = Effects(self.screen, settings)
         self.scoreboard = Scoreboard(settings)
+        self.final_percentile = None
+        self.assets_preloaded = False
+        self.mark_startup("ui")
+        
+        # Saving the config file while the game runs applies it (checked about once a second)
+        self.pending_config = None
+        self.config_watcher = None
+        if settings.config_reload and settings.config_file:
+            self.config_watcher = ConfigWatcher(settings.config_file)
         
-        # Last time Mario tried to spawn
-        self.last_mario_try_time = 0
-        self.mario_try_interval = 5  # seconds
+        # Frame profiling wraps the stages above in timers; off, nothing is wrapped
+        if settings.profiling:
+            self.profiler = FrameProfiler(settings.profile_history)
+            self.profile_overlay = ProfileOverlay(self.screen, settings, self.profiler)
+        else:
+            self.profiler = NullProfiler()
+            self.profile_overlay = None
+        self.instrument()
         
-        # Timing variables
+        # Timing variables - the simulation advances in fixed ticks, rendering as fast as allowed
         self.frame_count = 0
+        self.tick_time = 1.0 / settings.fps
+        self.max_frame_time = 0.25  # Don't try to catch up on more than this after a stall
+        self.frame_time = self.tick_time  # Real time the last frame covered, for render-side animation
     
     def process_events(self):
         """Process keyboard events and update game state"""
@@ -57,25 +98,32 @@ class Game:
             if event.type == pygame.QUIT:
                 self.running = False
                 return
+            
+            # F3 shows or hides the profiler in any state
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3 and self.profile_overlay:
+                self.profile_overlay.toggle()
+                continue
                 
             # Handle different game states
             if self.game_state == "MENU":
                 self.menu.handle_event(event)
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+                    # Fresh game, so it plays with whatever difficulty was just chosen
+                    self.reset_game()
                     self.game_state = "PLAYING"
                     
             elif self.game_state == "PLAYING":
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         self.game_state = "PAUSED"
-                    elif event.key == pygame.K_UP and self.snake.direction != "DOWN":
-                        self.snake.change_direction("UP")
-                    elif event.key == pygame.K_DOWN and self.snake.direction != "UP":
-                        self.snake.change_direction("DOWN")
-                    elif event.key == pygame.K_LEFT and self.snake.direction != "RIGHT":
-                        self.snake.change_direction("LEFT")
-                    elif event.key == pygame.K_RIGHT and self.snake.direction != "LEFT":
-                        self.snake.change_direction("RIGHT")
+                    elif event.key == pygame.K_UP and self.engine.snake.direction != "DOWN":
+                        self.engine.change_direction("UP")
+                    elif event.key == pygame.K_DOWN and self.engine.snake.direction != "UP":
+                        self.engine.change_direction("DOWN")
+                    elif event.key == pygame.K_LEFT and self.engine.snake.direction != "RIGHT":
+                        self.engine.change_direction("LEFT")
+                    elif event.key == pygame.K_RIGHT and self.engine.snake.direction != "LEFT":
+                        self.engine.change_direction("RIGHT")
                         
             elif self.game_state == "PAUSED":
                 if event.type == pygame.KEYDOWN:
@@ -102,65 +150,63 @@ class Game:
             # Check if any power-up effects are active
             if self.power_up_effects.update():
                 # Apply dragon mode to snake
-                self.snake.set_dragon_mode(self.power_up_effects.dragon_mode_active)
-            
-            # Move snake
-            snake_moved = self.snake.move()
-            
-            # Only process game updates when snake actually moves
-            if snake_moved:
-                # Check for collisions - only with self, not with walls
-                if self.snake.check_collision_with_self():
-                    self.game_state = "GAME_OVER"
-                    self.effects.play_effect("game_over")
-                    return
-                    
-                # Check if snake eats food
-                if self.snake.check_collision_with_food(self.food):
-                    self.snake.grow()
-                    self.food.respawn(self.snake)
-                    self.scoreboard.add_points(10)
-                    self.effects.play_effect("eat")
-                    
-                    # Increase speed very slightly based on score
-                    self.snake.increase_speed()
-                
-                # Check if snake collides with mushroom
-                if self.mario.check_mushroom_collision(self.snake):
-                    # Activate all special effects
-                    self.power_up_effects.activate_mushroom_power()
-                    self.scoreboard.add_points(50)  # Bonus points
-            
-            # Try to spawn Mario occasionally
-            current_time = time.time()
-            if current_time - self.last_mario_try_time > self.mario_try_interval:
-                self.last_mario_try_time = current_time
-                self.mario.try_spawn()
-            
-            # Update Mario if active
-            self.mario.update(self.snake)
+                self.engine.snake.set_dragon_mode(self.power_up_effects.dragon_mode_active)
+            
+            # Advance the simulation and react to what happened
+            events = self.engine.step()
+            
+            # Tick-based animations
+            self.engine.food.update_animation()
+            if self.engine.snake.dragon_mode:
+                self.engine.snake.update_fire_particles(self.tick_time)
+            self.scoreboard.score = self.engine.score
+            
+            if "game_over" in events:
+                self.game_state = "GAME_OVER"
+                self.save_replay()
+                self.record_score()
+                self.effects.play_effect("game_over")
+                return
+            
+            if "eat" in events:
+                self.effects.play_effect("eat")
+            
+            if "mushroom" in events:
+                # Activate all special effects
+                self.power_up_effects.activate_mushroom_power()
     
-    def render(self):
-        """Render game elements based on game state"""
+    def render(self, interpolation=1.0):
+        """Render game elements based on game state, interpolation of the way to the next tick"""
+        # Overlays and power-up effects draw outside the renderer's dirty tracking,
+        # and a scrolling view moves everything
+        full_frame = (self.game_state != "PLAYING"
+                      or self.power_up_effects.show_flag
+                      or self.power_up_effects.explosion_active
+                      or self.renderer.camera.enabled
+                      or (self.profile_overlay and self.profile_overlay.visible))
+        
         # Clear screen
-        self.screen.fill(self.settings.bg_color)
+        self.renderer.begin_frame(full_frame)
         
         if self.game_state == "MENU":
-            self.menu.render()
+            self.menu.render(self.frame_time)
             
         elif self.game_state == "PLAYING" or self.game_state == "PAUSED":
+            move_progress = self.get_move_progress(interpolation)
+            self.renderer.update_camera(self.engine.snake, move_progress)
+            
             # Render game elements
             self.renderer.render_grid()
-            self.renderer.render_food(self.food)
+            self.renderer.render_food(self.engine.food)
             
             # Render Mario and mushroom if active
-            self.renderer.render_mario(self.mario)
+            self.renderer.render_mario(self.engine.mario)
             
-            # Render the snake
-            self.renderer.render_snake(self.snake)
+            # Render the snake, sliding between cells
+            self.renderer.render_snake(self.engine.snake, move_progress)
             
-            # Render score
-            self.renderer.render_score(self.scoreboard.score)
+            # Render score, with where it would place right now
+            self.renderer.render_score(self.scoreboard.score, self.scoreboard.live_rank())
             
             # Render special effects
             self.power_up_effects.render()
@@ -172,38 +218,193 @@ class Game:
         elif self.game_state == "GAME_OVER":
             # Render game elements with overlay
             self.renderer.render_grid()
-            self.renderer.render_food(self.food)
-            self.renderer.render_snake(self.snake)
+            self.renderer.render_food(self.engine.food)
+            self.renderer.render_snake(self.engine.snake)
             self.renderer.render_score(self.scoreboard.score)
-            self.renderer.render_game_over(self.scoreboard.score)
+            self.renderer.render_game_over(self.scoreboard.score, self.final_percentile)
+        
+        if self.profile_overlay and self.profile_overlay.visible:
+            self.profile_overlay.render()
             
         # Update display
-        pygame.display.flip()
+        self.renderer.present()
     
     def reset_game(self):
         """Reset the game to initial state"""
         print(f"Resetting game with difficulty: {self.settings.difficulty}")
         print(f"Initial snake speed: {self.settings.initial_snake_speed}")
         
-        # Re-create snake with current settings
-        self.snake = Snake(self.settings)
+        # Keep a replay of a game abandoned from the pause menu
+        self.save_replay()
+        
+        # Rule changes from a config reloaded during the last game apply from this one
+        if self.pending_config:
+            config, self.pending_config = self.pending_config, None
+            self.apply_config(config)
         
-        # Reset food
-        self.food = Food(self.settings)
-        self.food.respawn(self.snake)
+        # Re-create snake, food and Mario with current settings, seeding each game afresh
+        self.engine.reset(seed=random.randrange(2**63))
+        self.replay_saved = False
         
         # Reset special features
-        self.mario = Mario(self.settings)
-        self.power_up_effects = PowerUpEffects(self.settings, self.screen)
+        self.power_up_effects = PowerUpEffects(self.settings, self.screen, clock=self.engine.clock)
+        self.profiler.instrument(self.power_up_effects, ("render",), "effects.")
         
-        # Reset score and timing
+        # Reset score
         self.scoreboard.reset()
-        self.last_mario_try_time = time.time()
+    
+    def record_score(self):
+        """Add the finished game to the score history, noting how it compares first"""
+        live_rank = self.scoreboard.live_rank()
+        self.final_percentile = live_rank[2] if live_rank else None
+        replay = Replay.from_engine(self.engine, self.settings) if self.scoreboard.client else None
+        self.scoreboard.add_high_score(self.settings.player_name, replay)
+    
+    def save_replay(self):
+        """Write the current game's replay, once, if recording is on"""
+        if not self.settings.record_replays or self.replay_saved or not self.engine.tick:
+            return
+        self.replay_saved = True
+        
+        os.makedirs(self.settings.replay_dir, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{self.engine.seed:016x}.replay"
+        Replay.from_engine(self.engine, self.settings).save(os.path.join(self.settings.replay_dir, name))
+    
+    def check_config(self):
+        """Pick up a saved config file"""
+        try:
+            config = self.config_watcher.poll(self.settings.default_config)
+        except ConfigError as e:
+            print(f"Config not reloaded: {e}")
+            return
+        if config is not None:
+            self.apply_config(config)
+    
+    def apply_config(self, config):
+        """Apply a reloaded config, rebuilding only the caches its changes affect"""
+        current = self.settings.config
+        changed = config.changed(current)
+        restart = changed & RESTART_FIELDS
+        if restart:
+            print(f"Config: restart to apply {', '.join(sorted(restart))}")
+        
+        # Startup-only values stay as the game started, and rules stay as the current game started,
+        # so replays and scores still describe the games they belong to
+        in_game = self.game_state in ("PLAYING", "PAUSED")
+        held = restart | (changed & GAMEPLAY_FIELDS if in_game else set())
+        self.pending_config = config if held - restart else None
+        if held:
+            config = config.replace(**{name: getattr(current, name) for name in held})
+        
+        changed = self.settings.apply_config(config)
+        renderer = self.renderer
+        if changed & {"grid_color", "world_edge_color"}:
+            renderer.grid_surface = renderer.create_grid_surface()
+            renderer.grid_chunks.clear()
+        if changed & {"bg_color", "grid_color", "world_edge_color", "dirty_rects"}:
+            renderer.dirty_rects_enabled = self.settings.dirty_rects
+            renderer.force_full_frame = True
+        if changed & {"ui_text_color", "ui_highlight_color"}:
+            # Overlays and menu text are cached with their colors baked in
+            text_cache.surfaces.clear()
+        if changed & {"snake_head_color", "snake_body_color", "dragon_head_color", "dragon_body_color"}:
+            self.engine.snake.set_dragon_mode(self.engine.snake.dragon_mode)
+        if "sfx_volume" in changed:
+            self.effects.update_volume()
+        
+        # Everything else is read as it's used or when the next game starts
+        if self.settings.debug_output:
+            print(f"Config reloaded: {', '.join(sorted(changed)) or 'no changes'}")
+    
+    def get_move_progress(self, interpolation):
+        """How far the snake is into its current move (0 to 1) at the rendered moment"""
+        snake = self.engine.snake
+        if not self.settings.interpolate_movement or self.game_state != "PLAYING":
+            return 1.0
+        
+        render_time = self.engine.clock() + interpolation * self.tick_time
+        return max(0.0, min(1.0, (render_time - snake.last_move_time) * snake.speed))
+    
+    def instrument(self):
+        """Time the stages of each frame with the profiler"""
+        profiler = self.profiler
+        profiler.instrument(self, GAME_STAGES)
+        profiler.instrument(self.renderer, RENDERER_STAGES)
+        profiler.instrument(self.menu, ("render",), "menu.")
+        profiler.instrument(self.power_up_effects, ("render",), "effects.")
+        if self.profile_overlay:
+            profiler.instrument(self.profile_overlay, ("render",), "profiler.")
+        
+        # Waiting for the frame cap, so the stages add up to the whole frame
+        self.wait_for_frame = profiler.timed("wait", self.clock.tick)
+    
+    def count_frame(self):
+        """Record the profiler's per-frame counters"""
+        self.profiler.count("snake length", len(self.engine.snake.body))
+        self.profiler.count("fire particles", len(self.engine.snake.fire_particles))
+        self.profiler.count("explosion particles", len(self.power_up_effects.explosion_particles))
+    
+    def mark_startup(self, stage):
+        """Record how long after start a startup stage finished"""
+        self.startup_times.append((stage, (time.perf_counter() - self.startup_start) * 1000))
+    
+    def report_startup(self):
+        """Print the startup timings"""
+        if self.settings.debug_output:
+            stages = ", ".join(f"{stage} {ms:.0f} ms" for stage, ms in self.startup_times)
+            print(f"Startup: {stages}")
+    
+    def preload_assets(self):
+        """Build sound, overlay and flag assets on a background thread once the menu is showing"""
+        def load():
+            self.renderer.preload()
+            self.power_up_effects.preload()
+            self.effects.preload()
+            self.scoreboard.preload()
+            self.mark_startup("background assets")
+            self.report_startup()
+        
+        threading.Thread(target=load, daemon=True).start()
     
     def run(self):
-        """Main game loop"""
+        """Main game loop - fixed simulation ticks, rendering interpolated in between"""
+        previous_time = time.perf_counter()
+        accumulator = 0.0
+        
         while self.running:
+            self.profiler.begin_frame()
+            current_time = time.perf_counter()
+            self.frame_time = min(current_time - previous_time, self.max_frame_time)
+            accumulator += self.frame_time
+            previous_time = current_time
+            
             self.process_events()
-            self.update()
-            self.render()
-            self.clock.tick(self.settings.fps) 
\ No newline at end of file
+            if self.config_watcher:
+                self.check_config()
+            
+            # Run as many simulation ticks as real time has covered
+            while accumulator >= self.tick_time:
+                self.update()
+                accumulator -= self.tick_time
+            
+            self.render(accumulator / self.tick_time)
+            
+            # First frame is up - load everything else without holding up the menu
+            if not self.assets_preloaded:
+                self.assets_preloaded = True
+                self.mark_startup("first frame")
+                self.preload_assets()
+            
+            # 0 leaves rendering uncapped
+            self.wait_for_frame(self.settings.max_render_fps)
+            
+            if self.profiler.enabled:
+                self.count_frame()
+            self.profiler.end_frame()
+        
+        # Keep the game that was running when the window closed
+        self.save_replay()
+        self.scoreboard.close()
+        
+        if self.profiler.enabled and self.settings.profile_export:
+            self.profiler.export(self.settings.profile_export) 
\ No newline at end of file
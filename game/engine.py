@@ -0,0 +1,119 @@
+"""
+Simulation engine - tick-driven game logic that runs without a display
+"""
+
+import random
+from game.snake import Snake
+from game.food import Food
+from game.special_items import Mario
+
+class SimulationEngine:
+    def __init__(self, settings, seed=None, rng=None, clock=None):
+        self.settings = settings
+        
+        # Randomness source - a seeded private RNG keeps runs reproducible (and replayable)
+        if seed is None and rng is None:
+            seed = random.randrange(2**63)
+        self.seed = seed  # None when the caller supplied its own RNG
+        self.rng = rng or random.Random(seed)
+        
+        # Time source in seconds - defaults to simulated time derived from ticks
+        self.tick_rate = settings.fps
+        self.clock = clock or self.simulated_time
+        
+        # Mario spawn attempts
+        self.mario_try_interval = 5  # seconds
+        
+        self.reset()
+    
+    def simulated_time(self):
+        """Get the simulated time in seconds for the current tick"""
+        return self.tick / self.tick_rate
+    
+    def reset(self, seed=None):
+        """Reset the simulation to a fresh game, reseeding the RNG if a seed is given"""
+        if seed is not None:
+            self.seed = seed
+            self.rng.seed(seed)
+        
+        self.tick = 0
+        self.score = 0
+        self.game_over = False
+        
+        # Direction changes as (tick, direction), enough to replay the game from its seed
+        self.inputs = []
+        
+        # Game objects share the engine's clock and RNG
+        self.snake = Snake(self.settings, clock=self.clock)
+        self.food = Food(self.settings, rng=self.rng)
+        self.food.respawn(self.snake)
+        self.mario = Mario(self.settings, rng=self.rng, clock=self.clock)
+        
+        self.last_mario_try_time = self.clock()
+    
+    def change_direction(self, direction):
+        """Queue a direction change for the snake"""
+        self.inputs.append((self.tick, direction))
+        self.snake.change_direction(direction)
+    
+    def step(self):
+        """Advance the simulation by one tick and return the events that happened"""
+        events = []
+        if self.game_over:
+            return events
+        
+        self.tick += 1
+        
+        # Only process game updates when snake actually moves
+        if self.snake.move():
+            events.append("move")
+            
+            # Check for collisions - only with self, not with walls
+            if self.snake.check_collision_with_self():
+                self.game_over = True
+                events.append("game_over")
+                return events
+            
+            # Check if snake eats food
+            if self.snake.check_collision_with_food(self.food):
+                self.snake.grow()
+                self.score += 10
+                events.append("eat")
+                
+                # Nowhere left to put food - the snake has filled the board
+                if not self.food.respawn(self.snake):
+                    self.game_over = True
+                    events.append("board_full")
+                    events.append("game_over")
+                    return events
+                
+                # Increase speed very slightly based on score
+                self.snake.increase_speed()
+            
+            # Check if snake collides with mushroom
+            if self.mario.check_mushroom_collision(self.snake):
+                self.score += 50  # Bonus points
+                events.append("mushroom")
+        
+        if self.settings.mario_enabled:
+            # Try to spawn Mario occasionally
+            current_time = self.clock()
+            if current_time - self.last_mario_try_time > self.mario_try_interval:
+                self.last_mario_try_time = current_time
+                if self.mario.try_spawn():
+                    events.append("mario")
+            
+            # Update Mario if active
+            self.mario.update(self.snake)
+        
+        return events
+    
+    def run(self, max_ticks, controller=None):
+        """Run until game over or max_ticks, optionally steering with controller(engine)"""
+        while not self.game_over and self.tick < max_ticks:
+            if controller:
+                direction = controller(self)
+                if direction:
+                    self.change_direction(direction)
+            self.step()
+        return self.score 
\ No newline at end of file
@@ -3,14 +3,13 @@ Food class - manages food generation and properties
 """
 
 import random
-import pygame
 
 class Food:
-    def __init__(self, settings):
+    def __init__(self, settings, rng=None):
         self.settings = settings
+        self.rng = rng or random  # Injectable for seeded headless runs
         self.grid_size = settings.grid_size
-        self.grid_width = settings.screen_width // settings.grid_size
-        self.grid_height = settings.screen_height // settings.grid_size
+        self.grid_width, self.grid_height = settings.grid_dimensions()
         
         # Initialize with a random position
         self.position = (0, 0)  # Will be set in respawn
@@ -44,11 +43,9 @@ class Food:
         self.respawn(None)
     
     def respawn(self, snake):
-        """Generate a new food position that doesn't collide with the snake"""
-        valid_position = False
-        
+        """Place food on a random cell not covered by the snake; False if the board is full"""
         # Choose food type
-        if random.random() < self.special_chance:
+        if self.rng.random() < self.special_chance:
             self.food_type = "special"
         else:
             self.food_type = "normal"
@@ -56,16 +53,16 @@ class Food:
         # Update color based on type
         self.color = self.food_types[self.food_type]["color"]
         
-        while not valid_position:
-            # Generate random position
-            x = random.randint(0, self.grid_width - 1)
-            y = random.randint(0, self.grid_height - 1)
-            potential_position = (x, y)
-            
-            # Check if position doesn't collide with snake
-            if snake is None or potential_position not in snake.get_all_positions():
-                self.position = potential_position
-                valid_position = True
+        if snake is None:
+            # Any cell will do
+            x = self.rng.randint(0, self.grid_width - 1)
+            y = self.rng.randint(0, self.grid_height - 1)
+            self.position = (x, y)
+            return True
+        
+        # Pick straight from the snake's index of empty cells
+        self.position = snake.free_cells.sample(self.rng)
+        return self.position is not None
     
     def update_animation(self):
         """Update food animation effects (pulsing, etc.)"""
@@ -0,0 +1,220 @@
+"""
+Grid helpers - index of empty cells for constant-time spawning, and bitboards
+"""
+
+from functools import lru_cache
+
+try:
+    popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+    def popcount(bits):
+        return bin(bits).count("1")
+
+class FreeCellIndex:
+    def __init__(self, grid_width, grid_height):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        
+        # Empty cells packed into a list, plus each cell's slot in that list
+        self.cells = [(x, y) for y in range(grid_height) for x in range(grid_width)]
+        self.slots = {cell: slot for slot, cell in enumerate(self.cells)}
+    
+    def __len__(self):
+        return len(self.cells)
+    
+    def __contains__(self, position):
+        return position in self.slots
+    
+    def add(self, position):
+        """Mark a cell as empty"""
+        if position not in self.slots:
+            self.slots[position] = len(self.cells)
+            self.cells.append(position)
+    
+    def remove(self, position):
+        """Mark a cell as taken by moving the last empty cell into its slot"""
+        slot = self.slots.pop(position, None)
+        if slot is None:
+            return
+        
+        last = self.cells.pop()
+        if last != position:
+            self.cells[slot] = last
+            self.slots[last] = slot
+    
+    def is_full(self):
+        """Check if no empty cell is left"""
+        return not self.cells
+    
+    def sample(self, rng):
+        """Pick a random empty cell, or None when the board is full"""
+        if not self.cells:
+            return None
+        return self.cells[rng.randrange(len(self.cells))]
+
+class SparseFreeCellIndex:
+    """Empty-cell index for large worlds - stores the taken cells only and samples by rejection"""
+    
+    def __init__(self, grid_width, grid_height):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.cell_count = grid_width * grid_height
+        self.taken = set()
+    
+    def __len__(self):
+        return self.cell_count - len(self.taken)
+    
+    def __contains__(self, position):
+        x, y = position
+        return 0 <= x < self.grid_width and 0 <= y < self.grid_height and position not in self.taken
+    
+    def add(self, position):
+        """Mark a cell as empty"""
+        self.taken.discard(position)
+    
+    def remove(self, position):
+        """Mark a cell as taken"""
+        self.taken.add(position)
+    
+    def is_full(self):
+        """Check if no empty cell is left"""
+        return len(self.taken) == self.cell_count
+    
+    def sample(self, rng):
+        """Pick a random empty cell, or None when the board is full"""
+        if self.is_full():
+            return None
+        
+        # Mostly empty: random cells hit an empty one within a couple of tries
+        if len(self.taken) * 2 <= self.cell_count:
+            while True:
+                index = rng.randrange(self.cell_count)
+                position = (index % self.grid_width, index // self.grid_width)
+                if position not in self.taken:
+                    return position
+        
+        # Mostly full: list what is left
+        free = [(x, y) for y in range(self.grid_height) for x in range(self.grid_width)
+                if (x, y) not in self.taken]
+        return free[rng.randrange(len(free))]
+
+# Boards up to this many cells list every empty cell; larger worlds use the sparse index
+DENSE_CELL_LIMIT = 2**16
+
+def free_cell_index(grid_width, grid_height):
+    """Create the empty-cell index suited to a board size"""
+    if grid_width * grid_height <= DENSE_CELL_LIMIT:
+        return FreeCellIndex(grid_width, grid_height)
+    return SparseFreeCellIndex(grid_width, grid_height)
+
+@lru_cache(maxsize=None)
+def wrap_masks(grid_width, grid_height):
+    """Whole-board, edge column and edge row masks for a board size, built once"""
+    first_col = sum(1 << (y * grid_width) for y in range(grid_height))
+    return {
+        "full": (1 << (grid_width * grid_height)) - 1,
+        "first_col": first_col,
+        "last_col": first_col << (grid_width - 1),
+        "first_row": (1 << grid_width) - 1,
+        "last_row": ((1 << grid_width) - 1) << (grid_width * (grid_height - 1)),
+    }
+
+class Bitboard:
+    """A set of cells stored as the bits of a Python int (bit y * grid_width + x)"""
+    
+    def __init__(self, grid_width, grid_height, bits=0):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.bits = bits
+        self.masks = wrap_masks(grid_width, grid_height)
+    
+    @classmethod
+    def from_positions(cls, grid_width, grid_height, positions):
+        """Build a bitboard holding the given cells"""
+        bits = 0
+        for x, y in positions:
+            bits |= 1 << (y * grid_width + x)
+        return cls(grid_width, grid_height, bits)
+    
+    def new(self, bits):
+        """A bitboard of the same size holding other bits"""
+        return Bitboard(self.grid_width, self.grid_height, bits)
+    
+    def __len__(self):
+        return popcount(self.bits)
+    
+    def __contains__(self, position):
+        x, y = position
+        return self.bits >> (y * self.grid_width + x) & 1 == 1
+    
+    def __iter__(self):
+        """Set cells as (x, y), lowest bit first"""
+        bits = self.bits
+        while bits:
+            low = bits & -bits
+            index = low.bit_length() - 1
+            yield index % self.grid_width, index // self.grid_width
+            bits ^= low
+    
+    def __or__(self, other):
+        return self.new(self.bits | other.bits)
+    
+    def __and__(self, other):
+        return self.new(self.bits & other.bits)
+    
+    def __sub__(self, other):
+        return self.new(self.bits & ~other.bits)
+    
+    def __invert__(self):
+        return self.new(self.masks["full"] ^ self.bits)
+    
+    def add(self, position):
+        """Set a cell"""
+        x, y = position
+        self.bits |= 1 << (y * self.grid_width + x)
+    
+    def remove(self, position):
+        """Clear a cell"""
+        x, y = position
+        self.bits &= ~(1 << (y * self.grid_width + x))
+    
+    def free_count(self):
+        """Number of cells not set"""
+        return self.grid_width * self.grid_height - len(self)
+    
+    def shift(self, direction):
+        """Move every cell one step in a direction, wrapping around the edges like the snake"""
+        bits, masks, width = self.bits, self.masks, self.grid_width
+        if direction == "RIGHT":
+            bits = (bits & ~masks["last_col"]) << 1 | (bits & masks["last_col"]) >> (width - 1)
+        elif direction == "LEFT":
+            bits = (bits & ~masks["first_col"]) >> 1 | (bits & masks["first_col"]) << (width - 1)
+        elif direction == "DOWN":
+            bits = (bits & ~masks["last_row"]) << width | (bits & masks["last_row"]) >> (width * (self.grid_height - 1))
+        elif direction == "UP":
+            bits = bits >> width | (bits & masks["first_row"]) << (width * (self.grid_height - 1))
+        return self.new(bits)
+    
+    def neighbors(self):
+        """Cells one orthogonal step away from any set cell (wrapping)"""
+        return self.new(self.shift("UP").bits | self.shift("DOWN").bits
+                        | self.shift("LEFT").bits | self.shift("RIGHT").bits)
+    
+    def around(self, position, radius):
+        """The square of cells within radius of a position, wrapping around the edges"""
+        area = self.new(0)
+        area.add(position)
+        for _ in range(radius):
+            rows = area | area.shift("LEFT") | area.shift("RIGHT")
+            area = rows | rows.shift("UP") | rows.shift("DOWN")
+        return area
+    
+    def flood_fill(self, start, blocked):
+        """All cells reachable from the start cells without crossing blocked cells"""
+        open_bits = self.masks["full"] & ~blocked.bits
+        region = self.new(start.bits & open_bits)
+        while True:
+            grown = (region.bits | region.neighbors().bits) & open_bits
+            if grown == region.bits:
+                return region
+            region = self.new(grown) 
\ No newline at end of file
@@ -0,0 +1,221 @@
+"""
+Replays - record a game as its seed, settings and inputs, and play it back headless
+
+File layout (little-endian):
+    header   magic "SNKR", version, seed (u64), settings JSON length (u32)
+    settings JSON with the gameplay settings the game ran with
+    inputs   count (u32), then one varint per input: tick delta << 2 | direction code
+    footer   final tick (u32), score (u32), SHA-256 digest of the final state
+"""
+
+import argparse
+import hashlib
+import json
+import struct
+import time
+from game.engine import SimulationEngine
+
+MAGIC = b"SNKR"
+VERSION = 1
+HEADER = struct.Struct("<4sBQI")
+COUNT = struct.Struct("<I")
+FOOTER = struct.Struct("<II32s")
+
+# Direction codes, in clockwise order like the batch simulator
+DIRECTIONS = ("UP", "RIGHT", "DOWN", "LEFT")
+
+# Settings that change how the simulation plays out
+GAMEPLAY_SETTINGS = (
+    "screen_width", "screen_height", "grid_size", "world_width", "world_height", "fps", "difficulty",
+    "initial_snake_speed", "max_snake_speed", "speed_increase_rate",
+    "mario_enabled", "mario_appearance_chance", "mario_stay_duration",
+)
+
+# Standard settings per difficulty, built once per process (fonts make Settings slow to build)
+STANDARD_SETTINGS = {}
+
+class ReplayError(Exception):
+    """Raised for files that are not valid replays"""
+
+def state_digest(engine):
+    """Hash everything that determines how the game continues, down to the RNG state"""
+    snake, food, mario = engine.snake, engine.food, engine.mario
+    state = (
+        engine.tick, engine.score, engine.game_over, engine.last_mario_try_time,
+        tuple(snake.body), snake.direction, snake.pending_direction,
+        snake.speed, snake.last_move_time, snake.growth_pending,
+        food.position, food.food_type,
+        mario.active, mario.position, mario.appear_time,
+        mario.mushroom_active, mario.mushroom_position,
+        engine.rng.getstate(),
+    )
+    return hashlib.sha256(repr(state).encode()).digest()
+
+def encode_varint(value, out):
+    """Append an unsigned LEB128 varint to a bytearray"""
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+def decode_varint(data, offset):
+    """Read an unsigned LEB128 varint, returning (value, next offset)"""
+    value = shift = 0
+    while True:
+        if offset >= len(data):
+            raise ReplayError("truncated input log")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+class Replay:
+    def __init__(self, seed, settings, inputs, final_tick, score, digest):
+        self.seed = seed
+        self.settings = settings      # Gameplay settings by name
+        self.inputs = inputs          # (tick, direction) pairs in tick order
+        self.final_tick = final_tick
+        self.score = score
+        self.digest = digest          # state_digest() at the final tick
+    
+    @classmethod
+    def from_engine(cls, engine, settings):
+        """Capture a game played on engine (which must have been seeded, not given an RNG)"""
+        if engine.seed is None:
+            raise ReplayError("games need a seed to be replayed")
+        snapshot = {name: getattr(settings, name) for name in GAMEPLAY_SETTINGS}
+        return cls(engine.seed, snapshot, list(engine.inputs), engine.tick, engine.score,
+                   state_digest(engine))
+    
+    def to_bytes(self):
+        """Encode the replay in the binary file format"""
+        settings = json.dumps(self.settings, sort_keys=True).encode()
+        data = bytearray(HEADER.pack(MAGIC, VERSION, self.seed, len(settings)))
+        data += settings
+        data += COUNT.pack(len(self.inputs))
+        
+        previous_tick = 0
+        for tick, direction in self.inputs:
+            encode_varint((tick - previous_tick) << 2 | DIRECTIONS.index(direction), data)
+            previous_tick = tick
+        
+        data += FOOTER.pack(self.final_tick, self.score, self.digest)
+        return bytes(data)
+    
+    @classmethod
+    def from_bytes(cls, data):
+        """Decode a replay from the binary file format"""
+        if len(data) < HEADER.size or data[:4] != MAGIC:
+            raise ReplayError("not a replay file")
+        _, version, seed, settings_length = HEADER.unpack_from(data)
+        if version != VERSION:
+            raise ReplayError(f"unsupported replay version {version}")
+        
+        try:
+            offset = HEADER.size
+            settings = json.loads(data[offset:offset + settings_length])
+            offset += settings_length
+            (count,) = COUNT.unpack_from(data, offset)
+            offset += COUNT.size
+        except (ValueError, struct.error) as e:
+            # Broken JSON (or text that isn't UTF-8) and a header cut short
+            raise ReplayError(f"bad replay header: {e}") from e
+        if not isinstance(settings, dict):
+            raise ReplayError("bad replay header: settings are not a table")
+        
+        inputs = []
+        tick = 0
+        for _ in range(count):
+            value, offset = decode_varint(data, offset)
+            tick += value >> 2
+            inputs.append((tick, DIRECTIONS[value & 3]))
+        
+        if len(data) - offset != FOOTER.size:
+            raise ReplayError("bad replay footer")
+        final_tick, score, digest = FOOTER.unpack_from(data, offset)
+        return cls(seed, settings, inputs, final_tick, score, digest)
+    
+    def canonical(self):
+        """The same game without inputs it never reaches (at or after the final tick) - its
+        to_bytes() is identical for every encoding of one game"""
+        inputs = [(tick, direction) for tick, direction in self.inputs if tick < self.final_tick]
+        return Replay(self.seed, self.settings, inputs, self.final_tick, self.score, self.digest)
+    
+    def save(self, path):
+        """Write the replay to a file"""
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+    
+    @classmethod
+    def load(cls, path):
+        """Read a replay from a file"""
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+    
+    @staticmethod
+    def standard_settings(difficulty):
+        """Quiet headless settings with the standard rules for a difficulty, shared within a process"""
+        if not isinstance(difficulty, str):
+            raise ReplayError(f"unknown difficulty {difficulty!r}")
+        settings = STANDARD_SETTINGS.get(difficulty)
+        if settings is None:
+            from utils.settings import Settings
+            settings = Settings(debug_output=False)
+            if not settings.change_difficulty(difficulty):
+                raise ReplayError(f"unknown difficulty {difficulty!r}")
+            STANDARD_SETTINGS[difficulty] = settings
+        return settings
+    
+    def make_settings(self):
+        """Build quiet headless settings matching the recorded game"""
+        from utils.settings import Settings
+        settings = Settings(debug_output=False)
+        for name, value in self.settings.items():
+            setattr(settings, name, value)
+        return settings
+    
+    def play(self, settings=None):
+        """Re-run the game headless up to its final tick and return the engine"""
+        engine = SimulationEngine(settings or self.make_settings(), seed=self.seed)
+        inputs = self.inputs
+        index = 0
+        
+        while not engine.game_over and engine.tick < self.final_tick:
+            # Inputs recorded at a tick were queued before the step that follows it
+            while index < len(inputs) and inputs[index][0] == engine.tick:
+                engine.change_direction(inputs[index][1])
+                index += 1
+            engine.step()
+        return engine
+    
+    def verify(self, settings=None):
+        """Check that playing the replay ends in exactly the recorded state"""
+        engine = self.play(settings)
+        return (engine.tick == self.final_tick and engine.score == self.score
+                and state_digest(engine) == self.digest)
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify recorded snake games")
+    parser.add_argument("paths", nargs="+", help="replay files")
+    args = parser.parse_args()
+    
+    failures = 0
+    for path in args.paths:
+        replay = Replay.load(path)
+        settings = replay.make_settings()
+        
+        start = time.perf_counter()
+        ok = replay.verify(settings)
+        elapsed = time.perf_counter() - start
+        
+        failures += not ok
+        rate = replay.final_tick / elapsed if elapsed else 0.0
+        print(f"{path}: score {replay.score}, {replay.final_tick} ticks, "
+              f"{len(replay.inputs)} inputs, {rate:.0f} ticks/s - {'ok' if ok else 'MISMATCH'}")
+    
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main() 
\ No newline at end of file
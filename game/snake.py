@@ -6,15 +6,16 @@ import pygame
 import random
 import math
 from collections import deque
+from game.grid import Bitboard, free_cell_index
+from ui.particles import ParticleSystem
 
 class Snake:
-    def __init__(self, settings):
+    def __init__(self, settings, clock=None):
         self.settings = settings
         self.grid_size = settings.grid_size
         
-        # Initialize snake in the middle of the screen
-        grid_width = settings.screen_width // settings.grid_size
-        grid_height = settings.screen_height // settings.grid_size
+        # Initialize snake in the middle of the screen (the board size is fixed for the snake's life)
+        self.grid_width, self.grid_height = grid_width, grid_height = settings.grid_dimensions()
         
         # Snake body represented as a deque of positions (x, y)
         self.body = deque()
@@ -25,15 +26,30 @@ class Snake:
         self.body.append((mid_x - 1, mid_y))    # Body
         self.body.append((mid_x - 2, mid_y))    # Tail
         
+        # Occupancy counts per cell, kept in step with body for O(1) lookups
+        self.occupancy = {}
+        self.free_cells = free_cell_index(grid_width, grid_height)
+        
+        # Optional bitboard of covered cells, for agents that evaluate whole positions at once
+        self.bitboard = Bitboard(grid_width, grid_height) if settings.bitboard_grid else None
+        for position in self.body:
+            self.add_occupancy(position)
+        
         # Movement properties
         self.direction = "RIGHT"
         self.speed = settings.initial_snake_speed  # Initialize with settings speed
-        print(f"Snake initialized with speed: {self.speed} (from settings: {settings.initial_snake_speed})")
+        self.move_interval = 1.0 / self.speed      # Seconds per move, updated with the speed
+        if settings.debug_output:
+            print(f"Snake initialized with speed: {self.speed} (from settings: {settings.initial_snake_speed})")
         self.growth_pending = 0
         
         # Key tracking for single press movement
         self.pending_direction = None
         self.last_move_time = 0
+        self.last_tail = None  # Cell the tail left on the last move, for smooth rendering
+        
+        # Clock used to pace movement (seconds); headless runs inject their own
+        self.clock = clock or (lambda: pygame.time.get_ticks() / 1000.0)
         
         # Visuals
         self.colors = {
@@ -43,7 +59,7 @@ class Snake:
         
         # Dragon mode
         self.dragon_mode = False
-        self.fire_particles = []
+        self.fire_particles = ParticleSystem(shrink=1.0)
         
         # Movement cooldown to prevent multiple direction changes per frame
         self.move_cooldown = 0
@@ -75,16 +91,20 @@ class Snake:
         self.apply_pending_direction()
         
         # Calculate move time based on current speed
-        current_time = pygame.time.get_ticks() / 1000.0  # Convert to seconds
-        move_interval = 1.0 / self.speed
+        current_time = self.clock()
         
         # Check if it's time to move
-        if current_time - self.last_move_time < move_interval:
+        if current_time - self.last_move_time < self.move_interval:
             return False  # Not time to move yet
         
         # Update last move time
         self.last_move_time = current_time
         
+        self.step()
+        return True  # Successfully moved
+    
+    def step(self):
+        """Advance the snake by one cell, ignoring movement timing"""
         # Get current head position
         head_x, head_y = self.body[0]
         
@@ -99,8 +119,7 @@ class Snake:
             new_head = (head_x + 1, head_y)
             
         # Wrap around screen edges
-        grid_width = self.settings.screen_width // self.settings.grid_size
-        grid_height = self.settings.screen_height // self.settings.grid_size
+        grid_width, grid_height = self.grid_width, self.grid_height
         
         wrapped_x = new_head[0] % grid_width
         wrapped_y = new_head[1] % grid_height
@@ -115,6 +134,7 @@ class Snake:
             
         # Add new head
         self.body.appendleft(new_head)
+        self.add_occupancy(new_head)
         
         # Create fire particles if in dragon mode
         if self.dragon_mode:
@@ -123,10 +143,30 @@ class Snake:
         # Remove tail if not growing
         if self.growth_pending > 0:
             self.growth_pending -= 1
+            self.last_tail = None
         else:
-            self.body.pop()
-            
-        return True  # Successfully moved
+            self.last_tail = self.body.pop()
+            self.remove_occupancy(self.last_tail)
+    
+    def add_occupancy(self, position):
+        """Count one more segment on a cell"""
+        count = self.occupancy.get(position, 0)
+        if not count:
+            self.free_cells.remove(position)
+            if self.bitboard is not None:
+                self.bitboard.add(position)
+        self.occupancy[position] = count + 1
+    
+    def remove_occupancy(self, position):
+        """Count one less segment on a cell"""
+        count = self.occupancy[position] - 1
+        if count:
+            self.occupancy[position] = count
+        else:
+            del self.occupancy[position]
+            self.free_cells.add(position)
+            if self.bitboard is not None:
+                self.bitboard.remove(position)
     
     def add_fire_particles(self):
         """Add fire particles behind the dragon's head"""
@@ -157,36 +197,21 @@ class Snake:
             particle_x = (neck_x + (head_x - neck_x) * 0.7 + offset_x + jitter_x) * self.grid_size
             particle_y = (neck_y + (head_y - neck_y) * 0.7 + offset_y + jitter_y) * self.grid_size
             
-            # Create particle
+            # Create particle (velocity was tuned per frame at 60fps)
             lifetime = random.uniform(0.5, 1.0)
             size = random.uniform(3, 6)
-            self.fire_particles.append({
-                'x': particle_x,
-                'y': particle_y,
-                'dx': -dx * random.uniform(0.5, 1.5) + random.uniform(-0.5, 0.5),
-                'dy': -dy * random.uniform(0.5, 1.5) + random.uniform(-0.5, 0.5),
-                'size': size,
-                'max_size': size,
-                'lifetime': lifetime,
-                'age': 0
-            })
+            self.fire_particles.emit(
+                particle_x,
+                particle_y,
+                (-dx * random.uniform(0.5, 1.5) + random.uniform(-0.5, 0.5)) * 60,
+                (-dy * random.uniform(0.5, 1.5) + random.uniform(-0.5, 0.5)) * 60,
+                size,
+                lifetime
+            )
     
     def update_fire_particles(self, dt):
         """Update fire particles"""
-        # Update existing particles
-        for particle in list(self.fire_particles):
-            particle['age'] += dt
-            if particle['age'] >= particle['lifetime']:
-                self.fire_particles.remove(particle)
-                continue
-                
-            # Update position
-            particle['x'] += particle['dx'] * dt * 60
-            particle['y'] += particle['dy'] * dt * 60
-            
-            # Shrink particle as it ages
-            age_factor = 1.0 - (particle['age'] / particle['lifetime'])
-            particle['size'] = particle['max_size'] * age_factor
+        self.fire_particles.update(dt)
     
     def grow(self):
         """Increase the snake's length"""
@@ -196,15 +221,18 @@ class Snake:
         """Increase the snake's speed by a tiny amount"""
         old_speed = self.speed
         self.speed = min(self.speed * (1.0 + self.settings.speed_increase_rate), self.settings.max_snake_speed)
+        self.move_interval = 1.0 / self.speed
         
         # Print debug info if speed changed
-        if abs(old_speed - self.speed) > 0.01:
+        if self.settings.debug_output and abs(old_speed - self.speed) > 0.01:
             print(f"Speed increased: {old_speed:.2f} -> {self.speed:.2f} (max: {self.settings.max_snake_speed})")
     
     def reset_speed(self):
         """Reset the snake's speed to the initial value from settings"""
         self.speed = self.settings.initial_snake_speed
-        print(f"Speed reset to {self.speed}")
+        self.move_interval = 1.0 / self.speed
+        if self.settings.debug_output:
+            print(f"Speed reset to {self.speed}")
     
     def set_dragon_mode(self, active):
         """Activate or deactivate dragon mode"""
@@ -220,13 +248,12 @@ class Snake:
                 "body": self.settings.snake_body_color
             }
             # Clear fire particles when dragon mode ends
-            self.fire_particles = []
+            self.fire_particles.clear()
     
     def check_collision_with_self(self):
         """Check if the snake's head collides with its body"""
-        head = self.body[0]
-        # Check if head position exists in the rest of the body
-        return head in list(self.body)[1:]
+        # The head overlaps the body when its cell holds more than one segment
+        return self.occupancy[self.body[0]] > 1
     
     def check_collision_with_walls(self, settings):
         """Check if the snake's head collides with the walls"""
@@ -246,14 +273,19 @@ class Snake:
         """Get all positions occupied by the snake"""
         return list(self.body)
     
-    def render_fire_particles(self, screen):
-        """Render fire particles"""
+    def is_occupied(self, position):
+        """Check if any snake segment is on the given cell"""
+        return position in self.occupancy
+    
+    def render_fire_particles(self, screen, to_screen=None):
+        """Render fire particles and return the screen regions they cover (to_screen maps world pixels)"""
+        rects = []
         if not self.dragon_mode:
-            return
+            return rects
             
-        for particle in self.fire_particles:
+        for x, y, size, progress, _ in self.fire_particles.particles():
             # Calculate color based on age
-            age_factor = 1.0 - (particle['age'] / particle['lifetime'])
+            age_factor = 1.0 - progress
             
             if age_factor > 0.7:
                 # Yellow/white
@@ -266,9 +298,13 @@ class Snake:
                 color = (255, 0, 0, int(255 * age_factor))
                 
             # Draw particle
-            pygame.draw.circle(
+            if to_screen:
+                x, y = to_screen(x, y)
+            rects.append(pygame.draw.circle(
                 screen,
                 color,
-                (int(particle['x']), int(particle['y'])),
-                int(particle['size'])
-            ) 
\ No newline at end of file
+                (int(x), int(y)),
+                int(size)
+            ))
+        
+        return rects 
\ No newline at end of file
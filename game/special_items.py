@@ -7,13 +7,18 @@ import random
 import time
 import math
 from utils.config import EXPLOSION_SIZE_FACTOR, FLAG_DURATION
+from ui.particles import ParticleSystem
+from ui.text import text_cache
 
 class Mario:
-    def __init__(self, settings):
+    def __init__(self, settings, rng=None, clock=None):
         self.settings = settings
+        
+        # Randomness and time sources - injectable for seeded headless runs
+        self.rng = rng or random
+        self.clock = clock or time.time
         self.grid_size = settings.grid_size
-        self.grid_width = settings.screen_width // settings.grid_size
-        self.grid_height = settings.screen_height // settings.grid_size
+        self.grid_width, self.grid_height = settings.grid_dimensions()
         
         # Mario state
         self.active = False
@@ -37,7 +42,7 @@ class Mario:
     
     def try_spawn(self):
         """Try to spawn Mario with the configured chance"""
-        if not self.active and random.random() < self.settings.mario_appearance_chance:
+        if not self.active and self.rng.random() < self.settings.mario_appearance_chance:
             self.spawn()
             return True
         return False
@@ -45,11 +50,11 @@ class Mario:
     def spawn(self):
         """Spawn Mario at a random position"""
         # Find valid position that's not at the edge
-        x = random.randint(2, self.grid_width - 3)
-        y = random.randint(2, self.grid_height - 3)
+        x = self.rng.randint(2, self.grid_width - 3)
+        y = self.rng.randint(2, self.grid_height - 3)
         self.position = (x, y)
         self.active = True
-        self.appear_time = time.time()
+        self.appear_time = self.clock()
         self.mushroom_active = False
         self.mushroom_position = None
     
@@ -59,13 +64,13 @@ class Mario:
             return False
         
         # Check if Mario's time is up
-        current_time = time.time()
+        current_time = self.clock()
         if current_time - self.appear_time > self.duration:
             self.active = False
             return False
         
         # If Mario is active and mushroom is not spawned, place mushroom randomly
-        if not self.mushroom_active and random.random() < 0.02:  # 2% chance per frame
+        if not self.mushroom_active and self.rng.random() < 0.02:  # 2% chance per frame
             self.spawn_mushroom(snake)
         
         return True
@@ -73,25 +78,26 @@ class Mario:
     def spawn_mushroom(self, snake):
         """Spawn a mushroom near Mario"""
         if self.active and not self.mushroom_active:
-            # Attempt to find a valid position for the mushroom
-            for _ in range(10):  # Try 10 times
-                dx = random.randint(-2, 2)
-                dy = random.randint(-2, 2)
-                
-                # Don't place directly on Mario
-                if dx == 0 and dy == 0:
-                    continue
+            # Collect the empty cells around Mario (never directly on him)
+            free_positions = []
+            for dx in range(-2, 3):
+                for dy in range(-2, 3):
+                    if dx == 0 and dy == 0:
+                        continue
                     
-                potential_pos = (
-                    max(0, min(self.grid_width - 1, self.position[0] + dx)),
-                    max(0, min(self.grid_height - 1, self.position[1] + dy))
-                )
-                
-                # Check if position doesn't collide with snake
-                if potential_pos not in snake.get_all_positions():
-                    self.mushroom_position = potential_pos
-                    self.mushroom_active = True
-                    break
+                    potential_pos = (
+                        max(0, min(self.grid_width - 1, self.position[0] + dx)),
+                        max(0, min(self.grid_height - 1, self.position[1] + dy))
+                    )
+                    
+                    # Check if position doesn't collide with snake
+                    if not snake.is_occupied(potential_pos):
+                        free_positions.append(potential_pos)
+            
+            # Mario is boxed in by the snake - try again later
+            if free_positions:
+                self.mushroom_position = self.rng.choice(free_positions)
+                self.mushroom_active = True
     
     def check_mushroom_collision(self, snake):
         """Check if snake collided with mushroom"""
@@ -103,10 +109,17 @@ class Mario:
 
 
 class PowerUpEffects:
-    def __init__(self, settings, screen):
+    # Pre-rendered flag and emblem surfaces, shared because the game recreates
+    # PowerUpEffects on every reset
+    flag_art = {}
+    
+    def __init__(self, settings, screen, clock=None):
         self.settings = settings
         self.screen = screen
         
+        # Time source - the game passes its simulation clock so effects pause with it
+        self.clock = clock or time.time
+        
         # Power-up state
         self.dragon_mode_active = False
         self.dragon_mode_start_time = 0
@@ -125,7 +138,7 @@ class PowerUpEffects:
         
         # Shockwave effects for nuclear explosion
         self.shockwaves = []
-        self.explosion_particles = []
+        self.explosion_particles = ParticleSystem(capacity=1024, shrink=0.7)
         
         # Lion animation
         self.lion_scale = 1.0
@@ -135,23 +148,23 @@ class PowerUpEffects:
         """Activate all effects from eating a mushroom"""
         # Show flag
         self.show_flag = True
-        self.flag_start_time = time.time()
+        self.flag_start_time = self.clock()
         self.lion_scale = 1.0
         self.lion_growing = True
         
         # Start explosion
         self.explosion_active = True
-        self.explosion_start_time = time.time()
+        self.explosion_start_time = self.clock()
         self.explosion_radius = 0
         self.shockwaves = []
-        self.explosion_particles = []
+        self.explosion_particles.clear()
         
         # Create initial shockwave
         self.add_shockwave()
         
         # Activate dragon mode
         self.dragon_mode_active = True
-        self.dragon_mode_start_time = time.time()
+        self.dragon_mode_start_time = self.clock()
     
     def add_shockwave(self):
         """Add a new shockwave effect"""
@@ -161,7 +174,7 @@ class PowerUpEffects:
             'speed': self.max_explosion_radius / (self.explosion_duration * 0.6),
             'thickness': random.randint(5, 12),
             'color': (255, 255, 255, 180),
-            'birth_time': time.time()
+            'birth_time': self.clock()
         })
     
     def add_explosion_particles(self, count=50):
@@ -188,22 +201,21 @@ class PowerUpEffects:
                 gray = random.randint(50, 100)
                 color = (gray, gray, gray, 200)
             
-            self.explosion_particles.append({
-                'x': center_x,
-                'y': center_y,
-                'dx': math.cos(angle) * speed,
-                'dy': math.sin(angle) * speed,
-                'size': size,
-                'color': color,
-                'lifetime': lifetime,
-                'age': 0,
-                'gravity': random.uniform(50, 150)
-            })
+            self.explosion_particles.emit(
+                center_x,
+                center_y,
+                math.cos(angle) * speed,
+                math.sin(angle) * speed,
+                size,
+                lifetime,
+                gravity=random.uniform(50, 150),
+                color=color
+            )
     
     def update(self):
         """Update all active effects"""
-        current_time = time.time()
-        dt = 1/60  # Assume 60fps for particle physics
+        current_time = self.clock()
+        dt = 1 / self.settings.fps  # Called once per fixed simulation tick
         
         # Update flag animation
         if self.show_flag:
@@ -255,17 +267,8 @@ class PowerUpEffects:
                 if wave['radius'] > wave['max_radius']:
                     self.shockwaves.remove(wave)
             
-            # Update particles
-            for particle in list(self.explosion_particles):
-                particle['age'] += dt
-                if particle['age'] >= particle['lifetime']:
-                    self.explosion_particles.remove(particle)
-                    continue
-                
-                # Update position with gravity
-                particle['dy'] += particle['gravity'] * dt
-                particle['x'] += particle['dx'] * dt
-                particle['y'] += particle['dy'] * dt
+            # Update particles (position with gravity)
+            self.explosion_particles.update(dt)
         
         # Update dragon mode
         if self.dragon_mode_active and current_time - self.dragon_mode_start_time > self.settings.dragon_mode_duration:
@@ -288,20 +291,44 @@ class PowerUpEffects:
     def render_iran_flag(self):
         """Render the Iran flag with enhanced lion in center"""
         # Flag dimensions - slightly larger
-        flag_width = self.settings.screen_width * 0.7
-        flag_height = self.settings.screen_height * 0.5
+        flag_width, flag_height = self.get_flag_size()
         
         # Position in center of screen
         x = (self.settings.screen_width - flag_width) // 2
         y = (self.settings.screen_height - flag_height) // 2
         
-        # Draw flag border
+        # Pre-rendered flag with its border
+        border_width = 5
+        self.screen.blit(self.get_flag_surface(), (x - border_width, y - border_width))
+        
+        # Emblem (improved lion) in center, pre-rendered per scale step of the animation
+        emblem = self.get_lion_emblem(self.lion_scale)
+        self.screen.blit(emblem, emblem.get_rect(center=(x + flag_width // 2, y + flag_height // 2)))
+        
+        # Add text with glow effect
+        self.render_glowing_text("MEGA UPGRADE!", 48, 
+                                 self.settings.screen_width // 2, 
+                                 y + flag_height + 50)
+    
+    def get_flag_size(self):
+        """Get the flag's width and height on screen"""
+        return self.settings.screen_width * 0.7, self.settings.screen_height * 0.5
+    
+    def get_flag_surface(self):
+        """Get the flag stripes and border, drawn once"""
+        flag_width, flag_height = self.get_flag_size()
+        key = ("flag", flag_width, flag_height, tuple(self.settings.iran_flag_colors))
+        if key in self.flag_art:
+            return self.flag_art[key]
+        
         border_width = 5
+        surface = pygame.Surface((flag_width + border_width*2, flag_height + border_width*2), pygame.SRCALPHA)
+        
+        # Draw flag border
         pygame.draw.rect(
-            self.screen,
+            surface,
             (0, 0, 0),
-            (x - border_width, y - border_width, 
-             flag_width + border_width*2, flag_height + border_width*2),
+            (0, 0, flag_width + border_width*2, flag_height + border_width*2),
             border_width,
             3  # Rounded corners
         )
@@ -311,51 +338,55 @@ class PowerUpEffects:
         
         for i, color in enumerate(self.settings.iran_flag_colors):
             pygame.draw.rect(
-                self.screen,
+                surface,
                 color,
-                (x, y + i * strip_height, flag_width, strip_height)
+                (border_width, border_width + i * strip_height, flag_width, strip_height)
             )
         
-        # Draw emblem (improved lion) in center, with scale animation
-        lion_size = min(flag_width, flag_height) * 0.35 * self.lion_scale  # Much larger than before
-        self.draw_enhanced_lion_emblem(
-            x + flag_width // 2,
-            y + flag_height // 2,
-            lion_size
-        )
-        
-        # Add text with glow effect
-        self.render_glowing_text("MEGA UPGRADE!", 48, 
-                                 self.settings.screen_width // 2, 
-                                 y + flag_height + 50)
+        self.flag_art[key] = surface
+        return surface
+    
+    def get_lion_emblem(self, scale):
+        """Get the lion emblem at an animation scale, drawn once per 0.01 step"""
+        flag_width, flag_height = self.get_flag_size()
+        scale = round(scale, 2)
+        key = ("lion", flag_width, flag_height, scale)
+        if key in self.flag_art:
+            return self.flag_art[key]
+        
+        lion_size = min(flag_width, flag_height) * 0.35 * scale  # Much larger than before
+        
+        # The mane, tail and legs all stay within 1.5 sizes of the center
+        half_extent = int(lion_size * 1.6) + 4
+        surface = pygame.Surface((half_extent * 2, half_extent * 2), pygame.SRCALPHA)
+        self.draw_enhanced_lion_emblem(half_extent, half_extent, lion_size, surface)
+        
+        self.flag_art[key] = surface
+        return surface
+    
+    def preload(self):
+        """Draw the flag and every emblem scale step ahead of the first mushroom"""
+        self.get_flag_surface()
+        for step in range(90, 121):
+            self.get_lion_emblem(step / 100)
     
     def render_glowing_text(self, text, size, x, y):
-        """Render text with a pulsing glow effect"""
-        font = pygame.font.Font(None, size)
-        
-        # Pulsing glow based on time
-        glow_intensity = 0.7 + 0.3 * math.sin(time.time() * 5)
-        
-        # Create multiple layers with increasing size for glow
-        for i in range(5, 0, -1):
-            alpha = int(150 * glow_intensity / i)
-            glow_color = (255, 255, 100, alpha)
-            glow_text = font.render(text, True, glow_color)
-            glow_rect = glow_text.get_rect(center=(x, y))
-            
-            # Expand the rect slightly for each layer
-            glow_rect.inflate_ip(i*4, i*4)
-            
-            # Draw the glow layer
-            self.screen.blit(glow_text, glow_rect)
-        
-        # Draw the main text
-        main_text = font.render(text, True, (255, 255, 255))
-        main_rect = main_text.get_rect(center=(x, y))
-        self.screen.blit(main_text, main_rect)
+        """Render text with a glow, pre-composited into a single surface"""
+        # font.render ignores the alpha of the glow color, so the layers never
+        # pulsed - the composite is the same every frame and is drawn once
+        font = text_cache.get_font(size)
+        text_surf = text_cache.render_glow(font, text, (255, 255, 255), (255, 255, 100))
+        
+        # The glow extends up and left, so line the main text up with the center
+        main_rect = pygame.Rect((0, 0), font.size(text))
+        main_rect.center = (x, y)
+        self.screen.blit(text_surf, text_surf.get_rect(bottomright=main_rect.bottomright))
     
-    def draw_enhanced_lion_emblem(self, center_x, center_y, size):
-        """Draw an enhanced lion emblem"""
+    def draw_enhanced_lion_emblem(self, center_x, center_y, size, surface=None):
+        """Draw an enhanced lion emblem (on the screen unless another surface is given)"""
+        if surface is None:
+            surface = self.screen
+        
         # Base lion color (gold)
         lion_color = (220, 180, 0)
         lion_dark = (180, 140, 0)
@@ -367,7 +398,7 @@ class PowerUpEffects:
         
         # Body (oval shape)
         pygame.draw.ellipse(
-            self.screen,
+            surface,
             lion_color,
             (center_x - body_width/2, center_y - body_height/2, body_width, body_height)
         )
@@ -376,7 +407,7 @@ class PowerUpEffects:
         for i in range(3):
             offset = size * 0.1 * i
             pygame.draw.arc(
-                self.screen,
+                surface,
                 lion_dark,
                 (center_x - body_width/2 + offset, center_y - body_height/2, body_width - offset*2, body_height),
                 math.pi * 0.2,
@@ -390,7 +421,7 @@ class PowerUpEffects:
         
         # Head (circle)
         pygame.draw.circle(
-            self.screen,
+            surface,
             lion_color,
             (int(head_x), int(head_y)),
             int(head_size)
@@ -402,7 +433,7 @@ class PowerUpEffects:
         
         # Left eye
         pygame.draw.circle(
-            self.screen,
+            surface,
             eye_color,
             (int(head_x - head_size * 0.2), int(head_y - head_size * 0.2)),
             int(eye_size)
@@ -410,7 +441,7 @@ class PowerUpEffects:
         
         # Right eye
         pygame.draw.circle(
-            self.screen,
+            surface,
             eye_color,
             (int(head_x + head_size * 0.2), int(head_y - head_size * 0.2)),
             int(eye_size)
@@ -423,7 +454,7 @@ class PowerUpEffects:
             (head_x - head_size * 0.3, head_y + head_size * 0.1)
         ]
         pygame.draw.polygon(
-            self.screen,
+            surface,
             lion_dark,
             nose_points
         )
@@ -445,7 +476,7 @@ class PowerUpEffects:
             
             # Draw mane segment
             pygame.draw.line(
-                self.screen,
+                surface,
                 mane_color,
                 (start_x, start_y),
                 (end_x, end_y),
@@ -459,7 +490,7 @@ class PowerUpEffects:
         
         # Front legs
         pygame.draw.rect(
-            self.screen,
+            surface,
             leg_color,
             (center_x + body_width/3 - leg_width/2, center_y + body_height/2 - leg_width/2, 
              leg_width, leg_height),
@@ -468,7 +499,7 @@ class PowerUpEffects:
         )
         
         pygame.draw.rect(
-            self.screen,
+            surface,
             leg_color,
             (center_x + body_width/4 - leg_width/2, center_y + body_height/2 - leg_width/2, 
              leg_width, leg_height),
@@ -478,7 +509,7 @@ class PowerUpEffects:
         
         # Back legs
         pygame.draw.rect(
-            self.screen,
+            surface,
             leg_color,
             (center_x - body_width/3 - leg_width/2, center_y + body_height/2 - leg_width/2, 
              leg_width, leg_height),
@@ -487,7 +518,7 @@ class PowerUpEffects:
         )
         
         pygame.draw.rect(
-            self.screen,
+            surface,
             leg_color,
             (center_x - body_width/4 - leg_width/2, center_y + body_height/2 - leg_width/2, 
              leg_width, leg_height),
@@ -511,7 +542,7 @@ class PowerUpEffects:
         # Draw tail curve
         if len(curve_points) >= 2:
             pygame.draw.lines(
-                self.screen,
+                surface,
                 lion_color,
                 False,
                 curve_points,
@@ -521,7 +552,7 @@ class PowerUpEffects:
             # Tail tuft
             tuft_size = size * 0.15
             pygame.draw.circle(
-                self.screen,
+                surface,
                 lion_dark,
                 (int(curve_points[-1][0]), int(curve_points[-1][1])),
                 int(tuft_size)
@@ -530,7 +561,7 @@ class PowerUpEffects:
     def render_explosion(self):
         """Render enhanced nuclear explosion effect with shockwaves and particles"""
         # Create gradient explosion
-        current_time = time.time()
+        current_time = self.clock()
         progress = (current_time - self.explosion_start_time) / self.explosion_duration
         
         # Draw particles first (so they appear behind the main explosion)
@@ -682,24 +713,22 @@ class PowerUpEffects:
     
     def render_explosion_particles(self):
         """Render explosion particles"""
-        for particle in self.explosion_particles:
+        for x, y, size, progress, color in self.explosion_particles.particles():
             # Calculate alpha based on age
-            progress = particle['age'] / particle['lifetime']
-            alpha = int(particle['color'][3] * (1 - progress))
+            alpha = int(color[3] * (1 - progress))
             
             # Ensure alpha is valid (0-255)
             alpha = max(0, min(255, alpha))
             
-            color = list(particle['color'])
-            color[3] = alpha
+            color = (int(color[0]), int(color[1]), int(color[2]), alpha)
             
             # Make sure particle size is at least 1 pixel
-            size = max(1, int(particle['size'] * (1 - progress * 0.7)))
+            size = max(1, int(size))
             
             # Draw particle
             pygame.draw.circle(
                 self.screen,
                 color,
-                (int(particle['x']), int(particle['y'])),
+                (int(x), int(y)),
                 size  # Particles shrink as they age
             ) 
\ No newline at end of file
@@ -0,0 +1,214 @@
+"""
+Tournament runner - plays many seeded headless games across processes
+
+Every game is identified by (difficulty, policy, seed) and is fully determined
+by it, so results are streamed to a JSON-lines file as they finish and an
+interrupted run picks up where it stopped.
+
+    python -m game.tournament --games 1000 --policies autopilot random --out results.jsonl
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from utils.profiler import percentile
+
+def straight_policy(settings, seed):
+    """Never turn - the snake wraps around the board until something happens"""
+    return None
+
+def random_policy(settings, seed):
+    """Turn at random now and then, from the game's own seeded RNG"""
+    rng = random.Random(seed ^ 0x5EED)
+    directions = ("UP", "DOWN", "LEFT", "RIGHT")
+    
+    def controller(engine):
+        if rng.random() < 0.02:
+            return rng.choice(directions)
+        return None
+    
+    return controller
+
+def autopilot_policy(settings, seed):
+    """The A* autopilot"""
+    from game.ai import Autopilot
+    return Autopilot(settings)
+
+# Agent policies by name: policy(settings, seed) returns an engine controller or None
+POLICIES = {
+    "straight": straight_policy,
+    "random": random_policy,
+    "autopilot": autopilot_policy,
+}
+
+def play_game(difficulty, policy, seed, max_ticks):
+    """Play one game and return its result record"""
+    from game.engine import SimulationEngine
+    from game.replay import Replay
+    
+    settings = Replay.standard_settings(difficulty)
+    engine = SimulationEngine(settings, seed=seed)
+    controller = POLICIES[policy](settings, seed)
+    counts = {"eat": 0, "mario": 0, "mushroom": 0}
+    
+    while not engine.game_over and engine.tick < max_ticks:
+        if controller:
+            direction = controller(engine)
+            if direction:
+                engine.change_direction(direction)
+        for event in engine.step():
+            if event in counts:
+                counts[event] += 1
+    
+    if engine.food.position is None:
+        outcome = "board_full"
+    elif engine.game_over:
+        outcome = "crashed"
+    else:
+        outcome = "timed_out"
+    
+    return {
+        "difficulty": difficulty, "policy": policy, "seed": seed,
+        "score": engine.score, "ticks": engine.tick, "length": len(engine.snake.body),
+        "outcome": outcome, "food": counts["eat"],
+        "marios": counts["mario"], "mushrooms": counts["mushroom"],
+    }
+
+def play_chunk(jobs, max_ticks):
+    """Worker entry point - play a list of (difficulty, policy, seed) games"""
+    return [play_game(difficulty, policy, seed, max_ticks) for difficulty, policy, seed in jobs]
+
+def load_results(path):
+    """Read finished results, ignoring a line cut short by an interrupted run
+    Returns (results, length of the file up to the last complete result)"""
+    results = []
+    length = 0
+    if not os.path.exists(path):
+        return results, length
+    
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                results.append(json.loads(line))
+            except ValueError:
+                break
+            length += len(line)
+    return results, length
+
+def summarize(results):
+    """Aggregate statistics per difficulty and policy"""
+    groups = {}
+    for result in results:
+        groups.setdefault((result["difficulty"], result["policy"]), []).append(result)
+    
+    summary = []
+    for (difficulty, policy), games in sorted(groups.items()):
+        scores = sorted(game["score"] for game in games)
+        ticks = [game["ticks"] for game in games]
+        marios = sum(game["marios"] for game in games)
+        mushrooms = sum(game["mushrooms"] for game in games)
+        outcomes = {}
+        for game in games:
+            outcomes[game["outcome"]] = outcomes.get(game["outcome"], 0) + 1
+        
+        summary.append({
+            "difficulty": difficulty,
+            "policy": policy,
+            "games": len(games),
+            "score": {
+                "mean": statistics.mean(scores),
+                "median": statistics.median(scores),
+                "p10": percentile(scores, 0.1),
+                "p90": percentile(scores, 0.9),
+                "max": scores[-1],
+            },
+            "mean_ticks": statistics.mean(ticks),
+            "outcomes": outcomes,
+            "marios_per_game": marios / len(games),
+            "games_with_mario": sum(1 for game in games if game["marios"]) / len(games),
+            "mushroom_hit_rate": mushrooms / marios if marios else 0.0,
+        })
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Play seeded headless games in parallel")
+    parser.add_argument("--games", type=int, default=100, help="games per difficulty and policy")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--ticks", type=int, default=36000, help="tick limit per game")
+    parser.add_argument("--difficulties", nargs="+", default=["EASY", "NORMAL", "HARD"])
+    parser.add_argument("--policies", nargs="+", default=sorted(POLICIES), choices=sorted(POLICIES))
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--chunk", type=int, default=20, help="games per task sent to a worker")
+    parser.add_argument("--out", default="tournament.jsonl", help="results file (appended to, for resuming)")
+    parser.add_argument("--summary", help="statistics file (default: next to the results)")
+    parser.add_argument("--scores", help="also record every score in this score store")
+    parser.add_argument("--score-backend", default="sqlite", choices=("sqlite", "log"))
+    args = parser.parse_args()
+    
+    # Skip games an earlier run already finished
+    results, length = load_results(args.out)
+    done = {(r["difficulty"], r["policy"], r["seed"]) for r in results}
+    jobs = [(difficulty, policy, seed)
+            for difficulty in args.difficulties
+            for policy in args.policies
+            for seed in range(args.seed, args.seed + args.games)
+            if (difficulty, policy, seed) not in done]
+    print(f"{len(jobs)} games to play ({len(done)} already done) on {args.workers} workers")
+    
+    store = None
+    if args.scores:
+        from utils.score_store import open_score_store
+        store = open_score_store(args.score_backend, args.scores)
+    date = time.strftime("%Y-%m-%d")
+    
+    start = time.perf_counter()
+    played = 0
+    # Cut off any partial last line and append - finished results are never rewritten,
+    # so being killed at any point loses at most the line being written
+    with open(args.out, "a") as out:
+        out.truncate(length)
+        
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(play_chunk, jobs[i:i + args.chunk], args.ticks)
+                       for i in range(0, len(jobs), args.chunk)]
+            
+            # Stream results to disk as chunks finish
+            for future in as_completed(futures):
+                chunk = future.result()
+                for result in chunk:
+                    out.write(json.dumps(result) + "\n")
+                    results.append(result)
+                out.flush()
+                
+                # One transaction per chunk, with the policy as the player
+                if store is not None:
+                    store.add_many([(result["score"], result["policy"], date, result["difficulty"])
+                                    for result in chunk])
+                
+                played += len(chunk)
+                elapsed = time.perf_counter() - start
+                print(f"  {played}/{len(jobs)} games, {played / elapsed:.1f} games/s")
+    
+    if store is not None:
+        store.close()
+    
+    summary = summarize(results)
+    summary_path = args.summary or os.path.splitext(args.out)[0] + ".summary.json"
+    with open(summary_path, "w") as f:
+        json.dump(summary, f, indent=2)
+    
+    for group in summary:
+        score = group["score"]
+        print(f"{group['difficulty']:6} {group['policy']:9} {group['games']:5} games: "
+              f"score mean {score['mean']:.0f} median {score['median']:.0f} max {score['max']}, "
+              f"{group['mean_ticks']:.0f} ticks, mushroom hit rate {group['mushroom_hit_rate']:.0%}")
+    print(f"Summary written to {summary_path}")
+
+if __name__ == "__main__":
+    main() 
\ No newline at end of file
@@ -4,19 +4,20 @@ A modern, modular implementation of the classic Snake game with enhanced visuals
 """
 
 import sys
+import time
 import pygame
 from game.core import Game
 from utils.settings import Settings
 
 def main():
-    # Initialize pygame
-    pygame.init()
+    start_time = time.perf_counter()
     
-    # Initialize settings
+    # Initialize settings (pygame modules are started by the game as they are needed)
     settings = Settings()
+    settings.load_config_file()
     
     # Create and run the game
-    game = Game(settings)
+    game = Game(settings, start_time)
     game.run()
     
     # Clean exit
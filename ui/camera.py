@@ -0,0 +1,69 @@
+"""
+Camera - scrolling view onto worlds larger than the window
+"""
+
+class Camera:
+    def __init__(self, settings):
+        self.grid_size = settings.grid_size
+        grid_width, grid_height = settings.grid_dimensions()
+        
+        # World and view sizes in pixels
+        self.world_width = grid_width * self.grid_size
+        self.world_height = grid_height * self.grid_size
+        self.view_width = settings.screen_width
+        self.view_height = settings.screen_height
+        
+        # Only axes where the world doesn't fit the window scroll
+        self.scroll_x = self.world_width > self.view_width
+        self.scroll_y = self.world_height > self.view_height
+        self.enabled = self.scroll_x or self.scroll_y
+        
+        # World pixel shown at the top-left of the window
+        self.x = 0
+        self.y = 0
+        
+        # Things this far outside the view are still drawn, so they slide in smoothly
+        self.margin = self.grid_size * 2
+    
+    def follow(self, x, y):
+        """Center the view on a cell position (fractional while the snake slides)"""
+        if self.scroll_x:
+            self.x = round((x + 0.5) * self.grid_size - self.view_width / 2)
+        if self.scroll_y:
+            self.y = round((y + 0.5) * self.grid_size - self.view_height / 2)
+    
+    def to_screen(self, x, y):
+        """Map a world pixel to the window, taking the copy of the wrapping world nearest the view"""
+        if self.scroll_x:
+            x = (x - self.x + self.margin) % self.world_width - self.margin
+        if self.scroll_y:
+            y = (y - self.y + self.margin) % self.world_height - self.margin
+        return x, y
+    
+    def is_visible(self, x, y, size=0):
+        """Check if a square of window pixels at (x, y) is (nearly) in view"""
+        return (-self.margin < x + size and x < self.view_width + self.margin
+                and -self.margin < y + size and y < self.view_height + self.margin)
+    
+    def spans(self, axis, chunk_size):
+        """(window offset, chunk index, length) for the world chunks covering the view on an axis"""
+        if axis == "x":
+            scroll, start, world_size, view_size = self.scroll_x, self.x, self.world_width, self.view_width
+        else:
+            scroll, start, world_size, view_size = self.scroll_y, self.y, self.world_height, self.view_height
+        
+        # A world smaller than the window sits at the top-left without wrapping
+        if not scroll:
+            return [(offset, offset // chunk_size, min(chunk_size, world_size - offset))
+                    for offset in range(0, world_size, chunk_size)]
+        
+        start %= world_size
+        chunk_start = int(start // chunk_size) * chunk_size
+        offset = chunk_start - start
+        spans = []
+        while offset < view_size:
+            length = min(chunk_size, world_size - chunk_start)
+            spans.append((offset, chunk_start // chunk_size, length))
+            offset += length
+            chunk_start = (chunk_start + length) % world_size
+        return spans 
\ No newline at end of file
@@ -5,150 +5,143 @@ Effects system - manages visual and audio effects
 import pygame
 import random
 import math
+import threading
+from array import array
+from utils.cache import load_asset, save_asset
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Fall back to pure-Python synthesis
+
+# Synthesized sounds: a sine sweep between two frequencies, optionally decaying
+# (envelope 1 - progress**decay_power)
+TONES = {
+    # Short beep with a quick decay
+    "eat": {"duration": 0.1, "start_frequency": 800, "end_frequency": 800,
+            "decay_power": 0.5, "volume": 0.4},
+    # High pitched tone descending to low tone
+    "game_over": {"duration": 0.6, "start_frequency": 700, "end_frequency": 100,
+                  "decay_power": None, "volume": 0.6},
+    # Quick ascending tones
+    "menu_select": {"duration": 0.15, "start_frequency": 300, "end_frequency": 700,
+                    "decay_power": None, "volume": 0.4},
+    # Quick click sound
+    "menu_change": {"duration": 0.05, "start_frequency": 500, "end_frequency": 500,
+                    "decay_power": 1.0, "volume": 0.3},
+}
+
+# Mixer sample formats as pygame.mixer.get_init() reports them: (amplitude scale, offset, array typecode)
+# (-32 is float32 - pygame has no 32-bit integer mixer)
+SAMPLE_FORMATS = {
+    8: (127, 128, "B"),
+    -8: (127, 0, "b"),
+    16: (32767, 32768, "H"),
+    -16: (32767, 0, "h"),
+    -32: (1.0, 0, "f"),
+}
 
 class Effects:
     def __init__(self, screen, settings):
         self.screen = screen
         self.settings = settings
         
-        # Initialize sound system
-        pygame.mixer.init()
-        
-        # Load sound effects
-        self.sound_effects = self.load_sound_effects()
+        # Sound system and effects start on first use or by preload()
+        self.sound_effects = None
+        self.sound_lock = threading.Lock()
         
         # Visual effects animations
         self.active_effects = []
     
+    def preload(self):
+        """Start audio ahead of first use (safe to call from a background thread)"""
+        self.get_sound_effects()
+    
+    def get_sound_effects(self):
+        """Get the sound effects, initializing the mixer and loading them on first use"""
+        with self.sound_lock:
+            if self.sound_effects is None:
+                pygame.mixer.init()
+                self.sound_effects = self.load_sound_effects()
+        return self.sound_effects
+    
     def load_sound_effects(self):
         """Load sound effects or create synthetic ones"""
         sounds = {}
         
+        sample_format = pygame.mixer.get_init()[1]
+        if sample_format not in SAMPLE_FORMATS:
+            print(f"Can't synthesize sounds for mixer format {sample_format} - sound effects off")
+            return sounds
+        
         # We'll use synthesized sounds to avoid requiring sound files
-        sounds["eat"] = self.create_eat_sound()
-        sounds["game_over"] = self.create_game_over_sound()
-        sounds["menu_select"] = self.create_menu_select_sound()
-        sounds["menu_change"] = self.create_menu_change_sound()
+        for name, tone in TONES.items():
+            sound = pygame.mixer.Sound(buffer=self.get_tone_pcm(tone))
+            sound.set_volume(tone["volume"] * self.settings.sfx_volume)
+            sounds[name] = sound
         
         return sounds
     
-    def create_eat_sound(self):
-        """Create a synthetic 'eat' sound effect"""
-        # Create a short beep sound using pygame.mixer
-        sound = pygame.mixer.Sound(self.generate_eat_tone())
-        sound.set_volume(0.4 * self.settings.sfx_volume)
-        return sound
-    
-    def create_game_over_sound(self):
-        """Create a synthetic 'game over' sound effect"""
-        sound = pygame.mixer.Sound(self.generate_game_over_tone())
-        sound.set_volume(0.6 * self.settings.sfx_volume)
-        return sound
-    
-    def create_menu_select_sound(self):
-        """Create a synthetic menu selection sound effect"""
-        sound = pygame.mixer.Sound(self.generate_menu_select_tone())
-        sound.set_volume(0.4 * self.settings.sfx_volume)
-        return sound
+    def update_volume(self):
+        """Apply the effects volume setting to sounds already loaded"""
+        for name, sound in (self.sound_effects or {}).items():
+            sound.set_volume(TONES[name]["volume"] * self.settings.sfx_volume)
     
-    def create_menu_change_sound(self):
-        """Create a synthetic menu change sound effect"""
-        sound = pygame.mixer.Sound(self.generate_menu_change_tone())
-        sound.set_volume(0.3 * self.settings.sfx_volume)
-        return sound
-    
-    def generate_eat_tone(self):
-        """Generate a simple tone for the eat sound"""
-        # Parameters for sound generation
-        sample_rate = 44100
-        duration = 0.1  # seconds
-        frequency = 800
-        
-        # Generate the tone
-        num_samples = int(sample_rate * duration)
-        buf = bytearray(num_samples)
-        
-        # Simple sine wave with a quick decay
-        for i in range(num_samples):
-            t = float(i) / sample_rate
-            decay = 1.0 - (float(i) / num_samples)**0.5
-            value = int(127 + 127 * decay * math.sin(2 * math.pi * frequency * t))
-            buf[i] = value
-            
-        return bytes(buf)
-    
-    def generate_game_over_tone(self):
-        """Generate a 'game over' sound effect"""
-        # Parameters for sound generation
-        sample_rate = 44100
-        duration = 0.6  # seconds
-        
-        # Start with high pitched tone descending to low tone
-        num_samples = int(sample_rate * duration)
-        buf = bytearray(num_samples)
-        
-        for i in range(num_samples):
-            t = float(i) / sample_rate
-            progress = float(i) / num_samples
-            
-            # Frequency decreases over time
-            frequency = 700 - 600 * progress
-            
-            value = int(127 + 127 * math.sin(2 * math.pi * frequency * t))
-            buf[i] = value
-            
-        return bytes(buf)
+    def get_tone_pcm(self, tone):
+        """Get PCM bytes for a tone in the mixer's format, from the disk cache when possible"""
+        frequency, sample_format, channels = pygame.mixer.get_init()
+        # The typecode is part of the key, so samples cached under an old format mapping aren't reused
+        key = (tone["duration"], tone["start_frequency"], tone["end_frequency"], tone["decay_power"],
+               frequency, sample_format, SAMPLE_FORMATS[sample_format][2], channels)
+        
+        pcm = load_asset("tone", key)
+        if pcm is None:
+            pcm = self.synthesize_tone(tone, frequency, sample_format, channels)
+            save_asset("tone", key, pcm)
+        return pcm
     
-    def generate_menu_select_tone(self):
-        """Generate a 'menu select' sound effect"""
-        # Parameters for sound generation
-        sample_rate = 44100
-        duration = 0.15  # seconds
-        
-        # Quick ascending tones
-        num_samples = int(sample_rate * duration)
-        buf = bytearray(num_samples)
-        
-        for i in range(num_samples):
-            t = float(i) / sample_rate
-            progress = float(i) / num_samples
-            
-            # Frequency increases over time
-            frequency = 300 + 400 * progress
+    def synthesize_tone(self, tone, sample_rate, sample_format, channels):
+        """Render a frequency sweep with an optional decay envelope as interleaved PCM"""
+        num_samples = int(sample_rate * tone["duration"])
+        start, end = tone["start_frequency"], tone["end_frequency"]
+        decay_power = tone["decay_power"]
+        scale, offset, typecode = SAMPLE_FORMATS[sample_format]
+        
+        if np is not None:
+            i = np.arange(num_samples)
+            t = i / sample_rate
+            progress = i / num_samples
             
-            value = int(127 + 127 * math.sin(2 * math.pi * frequency * t))
-            buf[i] = value
+            # Frequency moves linearly from start to end
+            value = np.sin(2 * np.pi * (start + (end - start) * progress) * t)
+            if decay_power is not None:
+                value *= 1.0 - progress**decay_power
             
-        return bytes(buf)
-    
-    def generate_menu_change_tone(self):
-        """Generate a 'menu change' sound effect"""
-        # Parameters for sound generation
-        sample_rate = 44100
-        duration = 0.05  # seconds
-        
-        # Quick click sound
-        num_samples = int(sample_rate * duration)
-        buf = bytearray(num_samples)
+            samples = (value * scale + offset).astype(np.dtype(typecode))
+            return np.repeat(samples, channels).tobytes()
         
+        # Pure-Python fallback, packed through the array module
+        samples = array(typecode)
         for i in range(num_samples):
             t = float(i) / sample_rate
             progress = float(i) / num_samples
+            value = math.sin(2 * math.pi * (start + (end - start) * progress) * t)
+            if decay_power is not None:
+                value *= 1.0 - progress**decay_power
             
-            # Simple click tone with decay
-            frequency = 500
-            decay = 1.0 - progress
-            
-            value = int(127 + 127 * decay * math.sin(2 * math.pi * frequency * t))
-            buf[i] = value
-            
-        return bytes(buf)
+            sample = value * scale + offset
+            if typecode != "f":
+                sample = int(sample)
+            samples.extend([sample] * channels)
+        return samples.tobytes()
     
     def play_effect(self, effect_name, **kwargs):
         """Play a sound effect and trigger a visual effect"""
         # Play sound effect if enabled
-        if self.settings.sound_enabled and effect_name in self.sound_effects:
-            self.sound_effects[effect_name].play()
+        if self.settings.sound_enabled:
+            sound_effects = self.get_sound_effects()
+            if effect_name in sound_effects:
+                sound_effects[effect_name].play()
         
         # Add visual effect
         if effect_name == "eat":
@@ -6,6 +6,8 @@ import pygame
 import math
 import time
 import random
+from ui.particles import ParticleSystem
+from ui.text import text_cache
 
 class MenuItem:
     def __init__(self, text, action=None, args=None):
@@ -15,19 +17,20 @@ class MenuItem:
         self.selected = False
         self.hover_scale = 1.0
         self.hover_growing = True
-        self.hover_speed = 0.002
+        self.hover_speed = 0.002  # Scale change per frame at 60fps
         self.hover_max = 1.05
         self.hover_min = 0.95
     
-    def update_animation(self):
-        """Update hover animation"""
+    def update_animation(self, dt):
+        """Update hover animation by dt seconds"""
         if self.selected:
+            step = self.hover_speed * dt * 60
             if self.hover_growing:
-                self.hover_scale += self.hover_speed
+                self.hover_scale += step
                 if self.hover_scale >= self.hover_max:
                     self.hover_growing = False
             else:
-                self.hover_scale -= self.hover_speed
+                self.hover_scale -= step
                 if self.hover_scale <= self.hover_min:
                     self.hover_growing = True
 
@@ -39,7 +42,7 @@ class Menu:
         self.selected_index = 0
         
         # Background animations
-        self.particles = []
+        self.particles = ParticleSystem(min_y=-20)  # Removed once off the top of the screen
         self.last_particle_time = 0
         self.particle_interval = 0.2  # Time between particle spawns
         
@@ -49,7 +52,7 @@ class Menu:
         # Animation variables
         self.title_y_offset = 0
         self.title_direction = 1
-        self.title_speed = 0.2
+        self.title_speed = 0.2  # Pixels per frame at 60fps
         self.title_max_offset = 10
     
     def create_menus(self):
@@ -89,20 +92,20 @@ class Menu:
                 if selected_item.action:
                     selected_item.action(*selected_item.args)
     
-    def render(self):
-        """Render the current menu screen"""
+    def render(self, dt=1/60):
+        """Render the current menu screen, animating it by dt seconds since the last frame"""
         # Fill background
         self.screen.fill(self.settings.bg_color)
         
         # Update and render background animations
-        self.update_particles()
+        self.update_particles(dt)
         self.render_particles()
         
         # Get current menu items
         menu_items = self.menus[self.current_menu]
         
         # Update title animation
-        self.update_title_animation()
+        self.update_title_animation(dt)
         
         # Render title
         title_text = "SNAKE GAME"
@@ -111,7 +114,7 @@ class Menu:
         elif self.current_menu == "settings":
             title_text = "SETTINGS"
             
-        title_surf = self.settings.title_font.render(title_text, True, self.settings.ui_highlight_color)
+        title_surf = text_cache.render(self.settings.title_font, title_text, self.settings.ui_highlight_color)
         title_rect = title_surf.get_rect(center=(self.settings.screen_width//2, 
                                                   self.settings.screen_height//4 + self.title_y_offset))
         self.screen.blit(title_surf, title_rect)
@@ -121,20 +124,20 @@ class Menu:
             # Update item animation if selected
             item.selected = (i == self.selected_index)
             if item.selected:
-                item.update_animation()
+                item.update_animation(dt)
                 text_color = self.settings.ui_highlight_color
             else:
                 text_color = self.settings.ui_text_color
             
             # Render item text
-            text_surf = self.settings.menu_font.render(item.text, True, text_color)
+            text_surf = text_cache.render(self.settings.menu_font, item.text, text_color)
             
             # Apply scale if selected
             if item.selected:
                 original_size = text_surf.get_size()
                 new_size = (int(original_size[0] * item.hover_scale), 
                             int(original_size[1] * item.hover_scale))
-                text_surf = pygame.transform.scale(text_surf, new_size)
+                text_surf = text_cache.render_scaled(self.settings.menu_font, item.text, text_color, new_size)
             
             # Position text
             text_rect = text_surf.get_rect(center=(
@@ -166,55 +169,50 @@ class Menu:
         # Render the current difficulty level if on main menu
         if self.current_menu == "main":
             diff_text = f"Difficulty: {self.settings.difficulty}"
-            diff_surf = self.settings.score_font.render(diff_text, True, self.settings.ui_text_color)
+            diff_surf = text_cache.render(self.settings.score_font, diff_text, self.settings.ui_text_color)
             diff_rect = diff_surf.get_rect(center=(self.settings.screen_width//2, 
                                                    self.settings.screen_height - 50))
             self.screen.blit(diff_surf, diff_rect)
     
-    def update_title_animation(self):
+    def update_title_animation(self, dt):
         """Update the floating animation of the title"""
-        self.title_y_offset += self.title_direction * self.title_speed
+        self.title_y_offset += self.title_direction * self.title_speed * dt * 60
         if abs(self.title_y_offset) > self.title_max_offset:
             self.title_direction *= -1
     
-    def update_particles(self):
+    def update_particles(self, dt):
         """Update background particle animations"""
         # Add new particles occasionally
         current_time = time.time()
         if current_time - self.last_particle_time > self.particle_interval:
             self.last_particle_time = current_time
             
-            # Add new particle
-            particle = {
-                'x': random.randint(0, self.settings.screen_width),
-                'y': self.settings.screen_height + 10,
-                'size': random.randint(3, 8),
-                'speed': random.uniform(0.5, 2.0),
-                'color': (
+            # Add new particle (drifting upwards, speed is per frame at 60fps)
+            self.particles.emit(
+                random.randint(0, self.settings.screen_width),
+                self.settings.screen_height + 10,
+                0,
+                -random.uniform(0.5, 2.0) * 60,
+                random.randint(3, 8),
+                color=(
                     min(255, self.settings.snake_head_color[0] + random.randint(-20, 20)),
                     min(255, self.settings.snake_head_color[1] + random.randint(-20, 20)),
                     min(255, self.settings.snake_head_color[2] + random.randint(-20, 20)),
                     random.randint(50, 150)  # Alpha
                 )
-            }
-            self.particles.append(particle)
+            )
         
-        # Update existing particles
-        for particle in self.particles[:]:
-            particle['y'] -= particle['speed']
-            
-            # Remove particles that have gone off screen
-            if particle['y'] < -20:
-                self.particles.remove(particle)
+        # Update existing particles, removing those that have gone off screen
+        self.particles.update(dt)
     
     def render_particles(self):
         """Render background particles"""
-        for particle in self.particles:
+        for x, y, size, _, color in self.particles.particles():
             pygame.draw.circle(
                 self.screen,
-                particle['color'],
-                (particle['x'], particle['y']),
-                particle['size']
+                [int(channel) for channel in color],
+                (x, y),
+                size
             )
     
     # Menu action functions
@@ -0,0 +1,132 @@
+"""
+Particle system - structure-of-arrays particles shared by all effects
+"""
+
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Fall back to plain Python lists
+
+class ParticleSystem:
+    # One array per particle property
+    FIELDS = ("x", "y", "dx", "dy", "gravity", "age", "lifetime", "size", "r", "g", "b", "a")
+    
+    def __init__(self, capacity=256, shrink=0.0, min_y=None):
+        self.count = 0
+        self.capacity = capacity
+        
+        # How much particles shrink over their lifetime (1.0 = down to nothing)
+        self.shrink = shrink
+        
+        # Particles above this height are removed (for effects without a lifetime)
+        self.min_y = min_y
+        
+        if np is not None:
+            self.arrays = {field: np.zeros(capacity) for field in self.FIELDS}
+        else:
+            self.arrays = {field: [] for field in self.FIELDS}
+    
+    def __len__(self):
+        return self.count
+    
+    def clear(self):
+        """Remove all particles"""
+        self.count = 0
+        if np is None:
+            for values in self.arrays.values():
+                values.clear()
+    
+    def emit(self, x, y, dx, dy, size, lifetime=math.inf, gravity=0.0, color=(255, 255, 255, 255)):
+        """Add a particle - velocity and gravity are in pixels per second"""
+        r, g, b, a = color
+        values = (x, y, dx, dy, gravity, 0.0, lifetime, size, r, g, b, a)
+        
+        if np is None:
+            for field, value in zip(self.FIELDS, values):
+                self.arrays[field].append(value)
+            self.count += 1
+            return
+        
+        # Double the preallocated arrays when full
+        if self.count == self.capacity:
+            self.capacity *= 2
+            for field in self.FIELDS:
+                grown = np.zeros(self.capacity)
+                grown[:self.count] = self.arrays[field][:self.count]
+                self.arrays[field] = grown
+        
+        for field, value in zip(self.FIELDS, values):
+            self.arrays[field][self.count] = value
+        self.count += 1
+    
+    def update(self, dt):
+        """Age and move all particles, dropping the expired ones"""
+        if not self.count:
+            return
+        
+        if np is None:
+            self.update_lists(dt)
+            return
+        
+        n = self.count
+        arrays = {field: values[:n] for field, values in self.arrays.items()}
+        
+        # Gravity first, then position, for all particles at once
+        arrays["age"] += dt
+        arrays["dy"] += arrays["gravity"] * dt
+        arrays["x"] += arrays["dx"] * dt
+        arrays["y"] += arrays["dy"] * dt
+        
+        alive = arrays["age"] < arrays["lifetime"]
+        if self.min_y is not None:
+            alive &= arrays["y"] >= self.min_y
+        
+        # Pack the survivors to the front of the arrays
+        survivors = int(alive.sum())
+        if survivors < n:
+            for field, values in arrays.items():
+                self.arrays[field][:survivors] = values[alive]
+            self.count = survivors
+    
+    def update_lists(self, dt):
+        """Pure-Python update, removing expired particles by swapping in the last one"""
+        arrays = self.arrays
+        x, y, dx, dy = arrays["x"], arrays["y"], arrays["dx"], arrays["dy"]
+        gravity, age, lifetime = arrays["gravity"], arrays["age"], arrays["lifetime"]
+        
+        i = 0
+        while i < self.count:
+            age[i] += dt
+            dy[i] += gravity[i] * dt
+            x[i] += dx[i] * dt
+            y[i] += dy[i] * dt
+            
+            if age[i] >= lifetime[i] or (self.min_y is not None and y[i] < self.min_y):
+                last = self.count - 1
+                for values in arrays.values():
+                    values[i] = values[last]
+                    values.pop()
+                self.count = last
+                continue
+            i += 1
+    
+    def particles(self):
+        """Iterate (x, y, size, progress, color) for rendering - progress runs 0 to 1 over the lifetime"""
+        n = self.count
+        if not n:
+            return iter(())
+        
+        arrays = {field: values[:n] for field, values in self.arrays.items()}
+        
+        if np is not None:
+            progress = arrays["age"] / arrays["lifetime"]
+            size = arrays["size"] * (1 - progress * self.shrink)
+            colors = zip(arrays["r"].tolist(), arrays["g"].tolist(), arrays["b"].tolist(), arrays["a"].tolist())
+            return zip(arrays["x"].tolist(), arrays["y"].tolist(), size.tolist(), progress.tolist(), colors)
+        
+        progress = [a / l for a, l in zip(arrays["age"], arrays["lifetime"])]
+        size = [s * (1 - p * self.shrink) for s, p in zip(arrays["size"], progress)]
+        colors = zip(arrays["r"], arrays["g"], arrays["b"], arrays["a"])
+        return zip(arrays["x"], arrays["y"], size, progress, colors) 
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""
+Profile overlay - FPS, frame-time histogram, stage timings and counters drawn over the game
+"""
+
+import time
+import pygame
+from ui.text import text_cache
+
+class ProfileOverlay:
+    """On-screen view of a FrameProfiler, toggled with F3"""
+    def __init__(self, screen, settings, profiler):
+        self.screen = screen
+        self.settings = settings
+        self.profiler = profiler
+        self.visible = False
+        self.font = text_cache.get_font(18)
+        
+        # Statistics cover the last second or so; the histogram a few seconds
+        self.summary_frames = 60
+        self.histogram_frames = 240
+        self.bucket_ms = 2
+        self.bucket_count = 17  # The last bucket collects everything slower
+        
+        # The panel is redrawn a few times a second and blitted in between
+        self.refresh_interval = 0.25
+        self.panel = None
+        self.panel_time = 0.0
+    
+    def toggle(self):
+        """Show or hide the overlay"""
+        self.visible = not self.visible
+        self.panel = None
+    
+    def render(self):
+        """Draw the overlay in the top-right corner"""
+        now = time.perf_counter()
+        if self.panel is None or now - self.panel_time >= self.refresh_interval:
+            self.panel = self.create_panel()
+            self.panel_time = now
+        if self.panel:
+            self.screen.blit(self.panel, (self.settings.screen_width - self.panel.get_width() - 10, 10))
+    
+    def create_panel(self):
+        """Draw the statistics of the latest frames onto a translucent panel"""
+        summary = self.profiler.summary(self.summary_frames)
+        if summary is None:
+            return None
+        
+        frame = summary["frame_ms"]
+        # (label, value, color) - values are right-aligned
+        lines = [
+            (f"{summary['fps']:.1f} FPS", f"{frame['mean']:.2f} ms", self.settings.ui_highlight_color),
+            ("p95 / max", f"{frame['p95']:.2f} / {frame['max']:.2f} ms", self.settings.ui_text_color),
+        ]
+        
+        # Slowest stages first
+        stages = sorted(summary["stages"].items(), key=lambda item: -item[1]["mean"])
+        for stage, stats in stages:
+            lines.append((stage, f"{stats['mean']:.2f} ms", self.settings.ui_text_color))
+        for counter, stats in summary["counters"].items():
+            lines.append((counter, f"{stats['mean']:.0f}", (170, 170, 190)))
+        
+        line_height = self.font.get_linesize()
+        histogram_height = 40
+        width = 250
+        height = line_height * len(lines) + histogram_height + 20
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        
+        y = 5
+        for label, value, color in lines:
+            panel.blit(self.font.render(label, True, color), (8, y))
+            value_text = self.font.render(value, True, color)
+            panel.blit(value_text, (width - 8 - value_text.get_width(), y))
+            y += line_height
+        
+        self.draw_histogram(panel, pygame.Rect(8, y + 5, width - 16, histogram_height))
+        return panel
+    
+    def draw_histogram(self, surface, rect):
+        """Draw how many recent frames fell into each frame-time bucket"""
+        counts = [0] * self.bucket_count
+        for frame_ms, _, _ in list(self.profiler.frames)[-self.histogram_frames:]:
+            counts[min(int(frame_ms // self.bucket_ms), self.bucket_count - 1)] += 1
+        
+        tallest = max(counts) or 1
+        bar_width = rect.width / self.bucket_count
+        for bucket, count in enumerate(counts):
+            # Green up to 60 FPS, yellow up to 30 FPS, red beyond
+            upper_ms = (bucket + 1) * self.bucket_ms
+            color = (80, 200, 80) if upper_ms <= 18 else (220, 200, 60) if upper_ms <= 34 else (220, 70, 60)
+            
+            bar_height = round(count / tallest * rect.height)
+            if bar_height:
+                pygame.draw.rect(surface, color, (rect.x + round(bucket * bar_width), rect.bottom - bar_height,
+                                                  max(1, round(bar_width) - 1), bar_height))
+        pygame.draw.line(surface, (120, 120, 140), rect.bottomleft, rect.bottomright) 
\ No newline at end of file
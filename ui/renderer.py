@@ -4,7 +4,16 @@ Renderer - handles all game visuals and graphical elements
 
 import pygame
 import math
-import time
+import threading
+from collections import OrderedDict
+from utils.cache import load_asset, save_asset
+from ui.text import text_cache
+from ui.camera import Camera
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Fall back to pure-Python asset generation
 
 class Renderer:
     def __init__(self, screen, settings):
@@ -17,15 +26,46 @@ class Renderer:
         
         # For smooth animations
         self.frame_counter = 0
-        self.last_frame_time = time.time()
+        
+        # View onto worlds larger than the window (does nothing when the world fits)
+        self.camera = Camera(settings)
+        
+        # Dirty-rect mode: only repaint and present the regions that changed
+        self.dirty_rects_enabled = settings.dirty_rects
+        self.dirty_rects = []           # Regions drawn this frame
+        self.previous_rects = []        # Regions drawn last frame, to be erased
+        self.partial_frame = False
+        self.force_full_frame = True    # Screen holds untracked drawing
         
     def load_assets(self):
         """Load graphical assets and create surfaces"""
         # Pre-render common elements
         self.grid_surface = self.create_grid_surface()
         
-        # Create gradient overlays for effects
-        self.vignette = self.create_vignette()
+        # Gradient overlays are only needed later - built on first use or by preload()
+        self.vignette = None
+        self.asset_lock = threading.Lock()
+        
+        # Glow sprites for special food, least recently used first
+        self.glow_sprites = OrderedDict()
+        self.glow_sprite_limit = 64
+        self.glow_radius_step = 0.5  # Pixels - radii are rounded to this step
+        
+        # Grid tiles for scrolling worlds - every chunk looks alike apart from the world edges
+        self.grid_chunks = OrderedDict()
+        self.grid_chunk_limit = 16
+        self.grid_chunk_cells = 16
+    
+    def preload(self):
+        """Build assets that were left out of startup (safe to call from a background thread)"""
+        self.get_vignette()
+    
+    def get_vignette(self):
+        """Get the vignette overlay, creating it on first use"""
+        with self.asset_lock:
+            if self.vignette is None:
+                self.vignette = self.create_vignette()
+        return self.vignette
     
     def create_grid_surface(self):
         """Pre-render the grid to improve performance"""
@@ -43,40 +83,156 @@ class Renderer:
     
     def create_vignette(self):
         """Create a vignette effect overlay"""
-        vignette = pygame.Surface((self.settings.screen_width, self.settings.screen_height), pygame.SRCALPHA)
-        
+        width, height = self.settings.screen_width, self.settings.screen_height
+        strength = 0.7
+        
+        # Alpha plane is cached on disk per resolution and strength
+        key = (width, height, strength)
+        alpha = load_asset("vignette", key)
+        if alpha is None or len(alpha) != width * height:
+            alpha = self.create_vignette_alpha(width, height, strength)
+            save_asset("vignette", key, alpha)
+        
+        # Black pixels with the alpha plane slotted into every fourth byte
+        rgba = bytearray(width * height * 4)
+        rgba[3::4] = alpha
+        return pygame.image.frombuffer(rgba, (width, height), "RGBA").copy()
+    
+    def create_vignette_alpha(self, width, height, strength):
+        """Compute the vignette's alpha per pixel, row by row, as bytes"""
         # Create radial gradient
-        center_x, center_y = self.settings.screen_width // 2, self.settings.screen_height // 2
+        center_x, center_y = width // 2, height // 2
         max_dist = math.sqrt(center_x**2 + center_y**2)
         
-        for x in range(self.settings.screen_width):
-            for y in range(self.settings.screen_height):
-                dist = math.sqrt((x - center_x)**2 + (y - center_y)**2)
-                # Calculate alpha based on distance from center
-                alpha = int(min(255, (dist / max_dist) * 255) * 0.7)
-                vignette.set_at((x, y), (0, 0, 0, alpha))
-                
-        return vignette
+        if np is not None:
+            # Distance field for the whole screen at once
+            dx = np.arange(width) - center_x
+            dy = np.arange(height) - center_y
+            dist = np.sqrt(dy[:, None]**2 + dx[None, :]**2)
+            alpha = np.minimum(255, (dist / max_dist) * 255) * strength
+            return alpha.astype(np.uint8).tobytes()
+        
+        # Rows the same distance above and below the center are identical
+        dx_squares = [(x - center_x)**2 for x in range(width)]
+        rows = {}
+        alpha = bytearray()
+        for y in range(height):
+            dy_square = (y - center_y)**2
+            if dy_square not in rows:
+                rows[dy_square] = bytes(
+                    int(min(255, (math.sqrt(dx_square + dy_square) / max_dist) * 255) * strength)
+                    for dx_square in dx_squares
+                )
+            alpha += rows[dy_square]
+        return bytes(alpha)
+    
+    def begin_frame(self, full_frame=False):
+        """Prepare the screen for a new frame - full_frame when untracked drawing follows"""
+        self.partial_frame = self.dirty_rects_enabled and not full_frame and not self.force_full_frame
+        
+        # Whatever is drawn outside the renderer must be wiped by a full repaint next frame
+        self.force_full_frame = full_frame
+        
+        if self.partial_frame:
+            # Erase last frame's regions back to background and grid
+            for rect in self.previous_rects:
+                self.screen.fill(self.settings.bg_color, rect)
+                self.screen.blit(self.grid_surface, rect, rect)
+        else:
+            self.screen.fill(self.settings.bg_color)
+    
+    def mark_dirty(self, rect):
+        """Record a region drawn this frame"""
+        self.dirty_rects.append(pygame.Rect(rect).clip(self.screen.get_rect()))
+    
+    def present(self):
+        """Show the frame, updating only changed regions in dirty-rect mode"""
+        if self.partial_frame:
+            pygame.display.update(self.previous_rects + self.dirty_rects)
+        else:
+            pygame.display.flip()
+        
+        self.previous_rects = self.dirty_rects
+        self.dirty_rects = []
     
     def render_grid(self):
         """Render the grid on screen"""
-        self.screen.blit(self.grid_surface, (0, 0))
+        if self.camera.enabled:
+            self.render_world_grid()
+        # Partial frames restore the grid under each erased region instead
+        elif not self.partial_frame:
+            self.screen.blit(self.grid_surface, (0, 0))
     
-    def render_snake(self, snake):
-        """Render the snake with advanced visual effects"""
-        segments = snake.get_all_positions()
+    def render_world_grid(self):
+        """Render the visible part of a scrolling world's grid from cached chunks"""
+        chunk_size = self.grid_chunk_cells * self.grid_size
+        for screen_y, row, height in self.camera.spans("y", chunk_size):
+            for screen_x, column, width in self.camera.spans("x", chunk_size):
+                self.screen.blit(self.get_grid_chunk(width, height, column == 0, row == 0), (screen_x, screen_y))
+    
+    def get_grid_chunk(self, width, height, left_edge, top_edge):
+        """Get a cached grid tile, with the world edge highlighted on its left or top side"""
+        key = (width, height, left_edge, top_edge)
+        
+        chunk = self.grid_chunks.get(key)
+        if chunk is None:
+            chunk = self.create_grid_chunk(*key)
+            self.grid_chunks[key] = chunk
+            if len(self.grid_chunks) > self.grid_chunk_limit:
+                self.grid_chunks.popitem(last=False)
+        else:
+            self.grid_chunks.move_to_end(key)
+        return chunk
+    
+    def create_grid_chunk(self, width, height, left_edge, top_edge):
+        """Draw the grid lines of one tile"""
+        chunk = pygame.Surface((width, height), pygame.SRCALPHA)
         
-        # Update delta time for fire particles
-        current_time = time.time()
-        dt = current_time - self.last_frame_time
-        self.last_frame_time = current_time
+        for x in range(0, width, self.grid_size):
+            color = self.settings.world_edge_color if x == 0 and left_edge else self.settings.grid_color
+            pygame.draw.line(chunk, color, (x, 0), (x, height))
         
-        # Update fire particles if in dragon mode
-        if snake.dragon_mode:
-            snake.update_fire_particles(dt)
+        for y in range(0, height, self.grid_size):
+            color = self.settings.world_edge_color if y == 0 and top_edge else self.settings.grid_color
+            pygame.draw.line(chunk, color, (0, y), (width, y))
+        
+        return chunk
+    
+    def update_camera(self, snake, move_progress=1.0):
+        """Keep the snake's head in the middle of the view"""
+        if self.camera.enabled:
+            self.camera.follow(*self.interpolate_segments(snake, move_progress, 1)[0])
+    
+    def cell_to_screen(self, x, y):
+        """Get the window position of a cell's top-left corner"""
+        return self.camera.to_screen(x * self.grid_size, y * self.grid_size)
+    
+    def interpolate_segments(self, snake, move_progress, count=None):
+        """Get segment positions (in cells) part way between the previous move and the current one"""
+        segments = snake.get_all_positions()
+        if move_progress >= 1.0:
+            return segments[:count]
+        
+        # Each segment came from where the next one is now; the tail from the cell it left
+        previous = segments[1:] + [snake.last_tail or segments[-1]]
+        segments, previous = segments[:count], previous[:count]
+        
+        positions = []
+        for (x, y), (prev_x, prev_y) in zip(segments, previous):
+            # Snap instead of sliding across the screen when wrapping around an edge
+            if abs(x - prev_x) > 1 or abs(y - prev_y) > 1:
+                positions.append((x, y))
+            else:
+                positions.append((prev_x + (x - prev_x) * move_progress,
+                                  prev_y + (y - prev_y) * move_progress))
+        return positions
+    
+    def render_snake(self, snake, move_progress=1.0):
+        """Render the snake with advanced visual effects, move_progress of the way into its last move"""
+        segments = snake.get_all_positions()
         
         # Draw each segment with a size based on its position
-        for i, (x, y) in enumerate(segments):
+        for i, (x, y) in enumerate(self.interpolate_segments(snake, move_progress)):
             # Calculate size
             if i == 0:  # Head
                 color = snake.colors["head"]
@@ -91,9 +247,21 @@ class Renderer:
                 segment_size = self.grid_size - 3 - (i / len(segments) * 2)
                 segment_size = max(segment_size, self.grid_size * 0.5)  # Don't let it get too small
             
+            # Segments outside a scrolling view are skipped
+            cell_x, cell_y = self.cell_to_screen(x, y)
+            if not self.camera.is_visible(cell_x, cell_y, self.grid_size):
+                continue
+            
             # Calculate position with offset to center in grid
-            pos_x = x * self.grid_size + (self.grid_size - segment_size) / 2
-            pos_y = y * self.grid_size + (self.grid_size - segment_size) / 2
+            pos_x = cell_x + (self.grid_size - segment_size) / 2
+            pos_y = cell_y + (self.grid_size - segment_size) / 2
+            
+            # Track the segment's cell (head gets a margin for dragon spikes)
+            cell_rect = pygame.Rect(int(cell_x) - 1, int(cell_y) - 1,
+                                    self.grid_size + 2, self.grid_size + 2)
+            if i == 0:
+                cell_rect.inflate_ip(self.grid_size, self.grid_size)
+            self.mark_dirty(cell_rect)
             
             # Draw segment with rounded corners or spikes for dragon
             if snake.dragon_mode and i == 0:
@@ -132,7 +300,7 @@ class Renderer:
                         perp_x, perp_y = -spike_y * side * 0.7, spike_x * side * 0.7
                         
                         # Draw spike
-                        pygame.draw.polygon(
+                        self.mark_dirty(pygame.draw.polygon(
                             self.screen,
                             snake.colors["head"],
                             [
@@ -140,7 +308,7 @@ class Renderer:
                                 (base_x + perp_x, base_y + perp_y),  # Tip
                                 (base_x + spike_x * 0.3, base_y + spike_y * 0.3)  # Back
                             ]
-                        )
+                        ))
                 
             else:
                 # Regular segments
@@ -188,49 +356,47 @@ class Renderer:
         
         # Render fire particles if in dragon mode
         if snake.dragon_mode:
-            snake.render_fire_particles(self.screen)
+            to_screen = self.camera.to_screen if self.camera.enabled else None
+            for rect in snake.render_fire_particles(self.screen, to_screen):
+                self.mark_dirty(rect)
                 
     def render_food(self, food):
         """Render food with animation effects"""
-        x, y = food.position
+        # No food left to show once the board is full
+        if food.position is None:
+            return
         
-        # Update animation
-        food.update_animation()
+        x, y = food.position
         
         # Calculate pulsing size
         base_size = self.grid_size * 0.7
         food_size = base_size * food.pulse_scale
         
+        # Food outside a scrolling view gets a marker on the window edge instead
+        cell_x, cell_y = self.cell_to_screen(x, y)
+        if not self.camera.is_visible(cell_x, cell_y, self.grid_size):
+            self.render_food_marker(food, cell_x, cell_y)
+            return
+        
         # Center food in the grid cell
-        pos_x = x * self.grid_size + (self.grid_size - food_size) / 2
-        pos_y = y * self.grid_size + (self.grid_size - food_size) / 2
+        pos_x = cell_x + (self.grid_size - food_size) / 2
+        pos_y = cell_y + (self.grid_size - food_size) / 2
         
         # Draw food with glow effect
         if food.food_type == "special":
             # Add glow for special food
-            glow_radius = food_size * 1.5
-            glow_surface = pygame.Surface((glow_radius*2, glow_radius*2), pygame.SRCALPHA)
-            
-            # Create radial gradient for glow
-            for gx in range(int(glow_radius*2)):
-                for gy in range(int(glow_radius*2)):
-                    distance = math.sqrt((gx - glow_radius)**2 + (gy - glow_radius)**2)
-                    if distance < glow_radius:
-                        # Calculate alpha based on distance from center
-                        alpha = int(255 * (1 - distance / glow_radius) * 0.5)
-                        glow_color = list(food.color)
-                        glow_color.append(alpha)
-                        glow_surface.set_at((gx, gy), glow_color)
+            glow_surface = self.get_glow_sprite(food.color, food_size * 1.5)
+            glow_radius = glow_surface.get_width() / 2
             
             # Calculate center position for glow
             glow_x = pos_x + food_size/2 - glow_radius
             glow_y = pos_y + food_size/2 - glow_radius
             
             # Apply glow
-            self.screen.blit(glow_surface, (glow_x, glow_y))
+            self.mark_dirty(self.screen.blit(glow_surface, (glow_x, glow_y)))
         
         # Draw food
-        pygame.draw.circle(
+        food_rect = pygame.draw.circle(
             self.screen, 
             food.color, 
             (pos_x + food_size/2, pos_y + food_size/2), 
@@ -246,6 +412,54 @@ class Renderer:
             (pos_x + highlight_offset, pos_y + highlight_offset),
             highlight_size / 6
         )
+        self.mark_dirty(food_rect)
+    
+    def render_food_marker(self, food, cell_x, cell_y):
+        """Point towards off-screen food with a dot on the nearest window edge"""
+        inset = self.grid_size / 2
+        marker_x = min(max(cell_x + self.grid_size / 2, inset), self.settings.screen_width - inset)
+        marker_y = min(max(cell_y + self.grid_size / 2, inset), self.settings.screen_height - inset)
+        pygame.draw.circle(self.screen, food.color, (marker_x, marker_y), self.grid_size / 4)
+    
+    def get_glow_sprite(self, color, radius):
+        """Get a cached radial glow sprite, building it on first use"""
+        # Rounding the radius lets the pulse animation reuse a handful of sprites
+        radius = max(self.glow_radius_step, round(radius / self.glow_radius_step) * self.glow_radius_step)
+        key = (tuple(color[:3]), radius)
+        
+        sprite = self.glow_sprites.get(key)
+        if sprite is None:
+            sprite = self.create_glow_sprite(key[0], radius)
+            self.glow_sprites[key] = sprite
+            if len(self.glow_sprites) > self.glow_sprite_limit:
+                self.glow_sprites.popitem(last=False)
+        else:
+            self.glow_sprites.move_to_end(key)
+        return sprite
+    
+    def create_glow_sprite(self, color, radius):
+        """Create a radial gradient sprite fading out from the center"""
+        size = int(radius * 2)
+        
+        if np is not None:
+            offsets = np.arange(size) - radius
+            distance = np.sqrt(offsets[:, None]**2 + offsets[None, :]**2)
+            alpha = np.where(distance < radius, 255 * (1 - distance / radius) * 0.5, 0)
+            alpha = alpha.astype(np.uint8).tobytes()
+        else:
+            alpha = bytearray()
+            for gy in range(size):
+                for gx in range(size):
+                    distance = math.sqrt((gx - radius)**2 + (gy - radius)**2)
+                    if distance < radius:
+                        alpha.append(int(255 * (1 - distance / radius) * 0.5))
+                    else:
+                        alpha.append(0)
+        
+        # Solid color with the gradient in the alpha channel
+        rgba = bytearray(bytes(color) + b"\0") * (size * size)
+        rgba[3::4] = alpha
+        return pygame.image.frombuffer(rgba, (size, size), "RGBA").copy()
     
     def render_mario(self, mario):
         """Render Mario and mushroom if active"""
@@ -253,12 +467,13 @@ class Renderer:
             return
         
         # Render Mario
-        x, y = mario.position
+        cell_x, cell_y = self.cell_to_screen(*mario.position)
+        self.mark_dirty((cell_x, cell_y, self.grid_size, self.grid_size))
         
         # Size and position calculations
         character_size = self.grid_size * 0.9
-        pos_x = x * self.grid_size + (self.grid_size - character_size) / 2
-        pos_y = y * self.grid_size + (self.grid_size - character_size) / 2
+        pos_x = cell_x + (self.grid_size - character_size) / 2
+        pos_y = cell_y + (self.grid_size - character_size) / 2
         
         # Draw Mario (simplified)
         # Head/face
@@ -290,12 +505,13 @@ class Renderer:
         
         # Render mushroom if active
         if mario.mushroom_active:
-            mushroom_x, mushroom_y = mario.mushroom_position
+            mushroom_x, mushroom_y = self.cell_to_screen(*mario.mushroom_position)
             mushroom_size = self.grid_size * 0.8
+            self.mark_dirty((mushroom_x, mushroom_y, self.grid_size, self.grid_size))
             
             # Position calculations
-            m_pos_x = mushroom_x * self.grid_size + (self.grid_size - mushroom_size) / 2
-            m_pos_y = mushroom_y * self.grid_size + (self.grid_size - mushroom_size) / 2
+            m_pos_x = mushroom_x + (self.grid_size - mushroom_size) / 2
+            m_pos_y = mushroom_y + (self.grid_size - mushroom_size) / 2
             
             # Draw mushroom stem
             stem_width = mushroom_size * 0.4
@@ -334,9 +550,13 @@ class Renderer:
                     spot_size
                 )
     
-    def render_score(self, score):
-        """Render the current score"""
-        score_text = self.settings.score_font.render(f"Score: {score}", True, self.settings.ui_text_color)
+    def render_score(self, score, live_rank=None):
+        """Render the current score, with its (rank, games, percentile) among recorded games if given"""
+        text = f"Score: {score}"
+        if live_rank:
+            rank, games, _ = live_rank
+            text += f"   #{rank} of {games + 1}"
+        score_text = text_cache.render(self.settings.score_font, text, self.settings.ui_text_color)
         score_rect = score_text.get_rect()
         score_rect.topleft = (10, 10)
         
@@ -344,58 +564,60 @@ class Renderer:
         bg_rect = score_rect.copy()
         bg_rect.inflate_ip(20, 10)  # Make background slightly larger
         pygame.draw.rect(self.screen, (0, 0, 0, 150), bg_rect, 0, 5)
+        self.mark_dirty(bg_rect)
         
         # Render the score
         self.screen.blit(score_text, score_rect)
     
     def render_pause_overlay(self):
         """Render the pause screen overlay"""
-        # Semi-transparent overlay
-        overlay = pygame.Surface((self.settings.screen_width, self.settings.screen_height), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 150))
-        self.screen.blit(overlay, (0, 0))
-        
-        # "PAUSED" text
-        pause_text = self.settings.title_font.render("PAUSED", True, self.settings.ui_text_color)
-        pause_rect = pause_text.get_rect(center=(self.settings.screen_width//2, self.settings.screen_height//2 - 40))
-        self.screen.blit(pause_text, pause_rect)
-        
-        # Instructions
-        instr1 = self.settings.menu_font.render("Press ESC to resume", True, self.settings.ui_text_color)
-        instr2 = self.settings.menu_font.render("Press Q to quit to menu", True, self.settings.ui_text_color)
-        
-        instr1_rect = instr1.get_rect(center=(self.settings.screen_width//2, self.settings.screen_height//2 + 20))
-        instr2_rect = instr2.get_rect(center=(self.settings.screen_width//2, self.settings.screen_height//2 + 60))
-        
-        self.screen.blit(instr1, instr1_rect)
-        self.screen.blit(instr2, instr2_rect)
+        self.screen.blit(self.get_overlay("pause"), (0, 0))
     
-    def render_game_over(self, score):
-        """Render the game over screen"""
-        # Semi-transparent overlay
-        overlay = pygame.Surface((self.settings.screen_width, self.settings.screen_height), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        self.screen.blit(overlay, (0, 0))
-        
-        # Apply vignette effect
-        self.screen.blit(self.vignette, (0, 0))
-        
-        # "GAME OVER" text
-        gameover_text = self.settings.title_font.render("GAME OVER", True, self.settings.ui_text_color)
-        gameover_rect = gameover_text.get_rect(center=(self.settings.screen_width//2, self.settings.screen_height//2 - 80))
-        self.screen.blit(gameover_text, gameover_rect)
+    def render_game_over(self, score, percentile=None):
+        """Render the game over screen, with the share of recorded games the score beat if given"""
+        self.screen.blit(self.get_overlay("game_over"), (0, 0))
         
         # Score
-        score_text = self.settings.menu_font.render(f"Final Score: {score}", True, self.settings.ui_text_color)
+        score_text = text_cache.render(self.settings.menu_font, f"Final Score: {score}", self.settings.ui_text_color)
         score_rect = score_text.get_rect(center=(self.settings.screen_width//2, self.settings.screen_height//2 - 20))
         self.screen.blit(score_text, score_rect)
         
-        # Instructions
-        instr1 = self.settings.menu_font.render("Press ENTER to play again", True, self.settings.ui_text_color)
-        instr2 = self.settings.menu_font.render("Press ESC to return to menu", True, self.settings.ui_text_color)
-        
-        instr1_rect = instr1.get_rect(center=(self.settings.screen_width//2, self.settings.screen_height//2 + 40))
-        instr2_rect = instr2.get_rect(center=(self.settings.screen_width//2, self.settings.screen_height//2 + 80))
-        
-        self.screen.blit(instr1, instr1_rect)
-        self.screen.blit(instr2, instr2_rect) 
\ No newline at end of file
+        if percentile is not None:
+            rank_text = text_cache.render(self.settings.score_font, f"Better than {percentile:.0f}% of games",
+                                          self.settings.ui_highlight_color)
+            self.screen.blit(rank_text, rank_text.get_rect(center=(score_rect.centerx, score_rect.bottom + 15)))
+    
+    def get_overlay(self, name):
+        """Get a full-screen overlay with its fixed text, composited into one surface"""
+        width, height = self.settings.screen_width, self.settings.screen_height
+        key = ("overlay", name, width, height)
+        return text_cache.lookup(key, lambda: self.create_overlay(name))
+    
+    def create_overlay(self, name):
+        """Draw the pause or game over overlay (everything except the final score)"""
+        width, height = self.settings.screen_width, self.settings.screen_height
+        center_x, center_y = width//2, height//2
+        overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+        
+        if name == "pause":
+            # Semi-transparent overlay
+            overlay.fill((0, 0, 0, 150))
+            lines = [
+                (self.settings.title_font, "PAUSED", center_y - 40),
+                (self.settings.menu_font, "Press ESC to resume", center_y + 20),
+                (self.settings.menu_font, "Press Q to quit to menu", center_y + 60),
+            ]
+        else:
+            # Semi-transparent overlay with the vignette effect on top
+            overlay.fill((0, 0, 0, 180))
+            overlay.blit(self.get_vignette(), (0, 0))
+            lines = [
+                (self.settings.title_font, "GAME OVER", center_y - 80),
+                (self.settings.menu_font, "Press ENTER to play again", center_y + 40),
+                (self.settings.menu_font, "Press ESC to return to menu", center_y + 80),
+            ]
+        
+        for font, text, y in lines:
+            text_surf = text_cache.render(font, text, self.settings.ui_text_color)
+            overlay.blit(text_surf, text_surf.get_rect(center=(center_x, y)))
+        return overlay 
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+Text cache - rendered text surfaces shared by the renderer, menus and effects
+"""
+
+import pygame
+from collections import OrderedDict
+
+class TextCache:
+    def __init__(self, limit=256):
+        # Rendered surfaces, least recently used first
+        self.surfaces = OrderedDict()
+        self.limit = limit
+        
+        # Fonts created by size, for text drawn without a settings font
+        self.fonts = {}
+    
+    def get_font(self, size):
+        """Get the default font at a size, loading it once"""
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        return font
+    
+    def lookup(self, key, build):
+        """Get a cached surface, calling build() to create it when missing"""
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        
+        surface = self.surfaces[key] = build()
+        if len(self.surfaces) > self.limit:
+            self.surfaces.popitem(last=False)
+        return surface
+    
+    def render(self, font, text, color, antialias=True):
+        """Get text rendered in a font and color"""
+        key = ("text", font, text, tuple(color), antialias)
+        return self.lookup(key, lambda: font.render(text, antialias, color))
+    
+    def render_scaled(self, font, text, color, size):
+        """Get text stretched to a size in pixels, e.g. for hover animations"""
+        key = ("scaled", font, text, tuple(color), size)
+        return self.lookup(key, lambda: pygame.transform.scale(self.render(font, text, color), size))
+    
+    def render_glow(self, font, text, color, glow_color, layers=5, spread=2):
+        """Get text over glow layers offset up and left, composited into one surface"""
+        key = ("glow", font, text, tuple(color), tuple(glow_color), layers, spread)
+        
+        def build():
+            main_text = self.render(font, text, color)
+            glow_text = self.render(font, text, glow_color)
+            margin = layers * spread
+            width, height = main_text.get_size()
+            surface = pygame.Surface((width + margin, height + margin), pygame.SRCALPHA)
+            
+            # Outermost layer first, each one shifted spread pixels less than the last
+            for i in range(layers, 0, -1):
+                surface.blit(glow_text, (margin - i * spread, margin - i * spread))
+            surface.blit(main_text, (margin, margin))
+            return surface
+        
+        return self.lookup(key, build)
+    
+    def clear(self):
+        """Drop all cached surfaces"""
+        self.surfaces.clear()
+
+# One cache for the whole game
+text_cache = TextCache() 
\ No newline at end of file
@@ -0,0 +1,36 @@
+"""
+Asset cache - keeps generated assets on disk between runs
+"""
+
+import os
+import zlib
+import hashlib
+
+# Generated assets live in the user's home so every launch can reuse them
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".snake_game_cache")
+
+def cache_path(name, key):
+    """Get the file path for an asset and the parameters it was built from"""
+    digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{name}_{digest}.bin")
+
+def load_asset(name, key):
+    """Load cached bytes for an asset, or None if missing or unreadable"""
+    try:
+        with open(cache_path(name, key), 'rb') as f:
+            return zlib.decompress(f.read())
+    except (IOError, zlib.error):
+        return None
+
+def save_asset(name, key, data):
+    """Store bytes for an asset - written to a temp file first so readers never see half a file"""
+    path = cache_path(name, key)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(zlib.compress(data))
+        os.replace(temp_path, path)
+    except IOError:
+        # The cache is only an optimization - carry on without it
+        pass 
\ No newline at end of file
@@ -0,0 +1,308 @@
+"""
+Game config - validated, read-only snapshots of the settings, loaded from TOML or JSON
+
+A config file only lists what it changes, e.g. snake_config.toml:
+    
+    difficulty = "HARD"
+    grid_color = [40, 40, 60]
+    sfx_volume = 0.4
+    
+    [difficulty_settings.HARD]
+    max_snake_speed = 15.0
+"""
+
+import json
+import os
+import time
+from collections.abc import Mapping
+from types import MappingProxyType
+
+try:
+    import tomllib
+except ImportError:
+    tomllib = None  # Before Python 3.11 only JSON configs can be read
+
+class ConfigError(Exception):
+    """Raised for config files that can't be read or hold invalid values"""
+
+def check_bool(value):
+    """A true/false value"""
+    if not isinstance(value, bool):
+        raise ValueError("must be true or false")
+    return value
+
+def check_int(minimum):
+    """Check for a whole number of at least minimum"""
+    def check(value):
+        if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+            raise ValueError(f"must be a whole number of at least {minimum}")
+        return value
+    return check
+
+def check_number(minimum, maximum=None):
+    """Check for a number in a range, given back as a float"""
+    def check(value):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError("must be a number")
+        if value < minimum or (maximum is not None and value > maximum):
+            raise ValueError(f"must be between {minimum} and {maximum}" if maximum is not None
+                             else f"must be at least {minimum}")
+        return float(value)
+    return check
+
+def check_optional(check):
+    """Let a check also accept None"""
+    def optional(value):
+        return None if value is None else check(value)
+    return optional
+
+def check_text(value):
+    """A non-empty string"""
+    if not isinstance(value, str) or not value:
+        raise ValueError("must be a non-empty string")
+    return value
+
+def check_choice(*choices):
+    """Check for one of a few values"""
+    def check(value):
+        if value not in choices:
+            raise ValueError(f"must be one of {', '.join(map(repr, choices))}")
+        return value
+    return check
+
+def check_color(value):
+    """An RGB color, given back as a tuple"""
+    if (not isinstance(value, (list, tuple)) or len(value) != 3
+            or not all(isinstance(c, int) and not isinstance(c, bool) and 0 <= c <= 255 for c in value)):
+        raise ValueError("must be three whole numbers from 0 to 255")
+    return tuple(value)
+
+# Per-difficulty values and their checks
+DIFFICULTY_FIELDS = {
+    "initial_snake_speed": check_number(0.1),
+    "max_snake_speed": check_number(0.1),
+    "special_food_chance": check_number(0, 1),
+    "mario_appearance_chance": check_number(0, 1),
+}
+
+def check_difficulties(value):
+    """A table of difficulties, each with every DIFFICULTY_FIELDS value, made read-only
+    Every problem found is one argument of the ValueError raised"""
+    if not isinstance(value, Mapping) or not value:
+        raise ValueError("must be a table of difficulties")
+    table = {}
+    errors = []
+    for name, entry in value.items():
+        if not isinstance(entry, Mapping):
+            errors.append(f"{name} must be a table")
+            continue
+        unknown = set(entry) - set(DIFFICULTY_FIELDS)
+        if unknown:
+            errors.append(f"{name} has unknown values: {', '.join(sorted(unknown))}")
+        missing = set(DIFFICULTY_FIELDS) - set(entry)
+        if missing:
+            errors.append(f"{name} is missing values: {', '.join(sorted(missing))}")
+        
+        checked = {}
+        for key in DIFFICULTY_FIELDS:
+            if key not in entry:
+                continue
+            try:
+                checked[key] = DIFFICULTY_FIELDS[key](entry[key])
+            except ValueError as e:
+                errors.append(f"{name} {key} {e}")
+        if len(checked) < len(DIFFICULTY_FIELDS):
+            continue
+        if checked["max_snake_speed"] < checked["initial_snake_speed"]:
+            errors.append(f"{name} max_snake_speed is below its initial_snake_speed")
+        table[name] = MappingProxyType({key: checked[key] for key in DIFFICULTY_FIELDS})
+    
+    if errors:
+        raise ValueError(*errors)
+    return MappingProxyType(table)
+
+# Settings a config file may change, with the check each value has to pass
+FIELDS = {
+    "screen_width": check_int(100),
+    "screen_height": check_int(100),
+    "fps": check_int(1),
+    "max_render_fps": check_int(0),
+    "vsync": check_bool,
+    "interpolate_movement": check_bool,
+    "dirty_rects": check_bool,
+    "record_replays": check_bool,
+    "replay_dir": check_text,
+    "profiling": check_bool,
+    "profile_history": check_int(1),
+    "profile_export": check_optional(check_text),
+    "player_name": check_text,
+    "score_backend": check_choice("sqlite", "log"),
+    "score_file": check_text,
+    "background_score_writes": check_bool,
+    "score_flush_timeout": check_number(0),
+    "leaderboard_server": check_optional(check_text),
+    "leaderboard_queue_file": check_text,
+    "grid_size": check_int(4),
+    "bitboard_grid": check_bool,
+    "world_width": check_optional(check_int(4)),
+    "world_height": check_optional(check_int(4)),
+    "bg_color": check_color,
+    "grid_color": check_color,
+    "world_edge_color": check_color,
+    "snake_head_color": check_color,
+    "snake_body_color": check_color,
+    "food_color": check_color,
+    "special_food_color": check_color,
+    "ui_text_color": check_color,
+    "ui_highlight_color": check_color,
+    "dragon_head_color": check_color,
+    "dragon_body_color": check_color,
+    "dragon_fire_color": check_color,
+    "mario_enabled": check_bool,
+    "mario_stay_duration": check_number(0),
+    "mushroom_duration": check_number(0),
+    "dragon_mode_duration": check_number(0),
+    "sound_enabled": check_bool,
+    "music_volume": check_number(0, 1),
+    "sfx_volume": check_number(0, 1),
+    "speed_increase_rate": check_number(0),
+    "difficulty": check_text,
+    "difficulty_settings": check_difficulties,
+}
+
+# Fields only read at startup - changing them in a running game waits for a restart
+RESTART_FIELDS = frozenset({
+    "screen_width", "screen_height", "fps", "vsync", "grid_size", "world_width", "world_height",
+    "bitboard_grid", "profiling", "profile_history", "score_backend", "score_file",
+    "background_score_writes", "leaderboard_server", "leaderboard_queue_file",
+})
+
+class Frozen:
+    """Base for read-only slotted objects - values are set once, through object.__setattr__"""
+    __slots__ = ()
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only - load or replace() a new one")
+    
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+class DifficultyProfile(Frozen):
+    """One difficulty's values"""
+    __slots__ = tuple(DIFFICULTY_FIELDS) + ("name",)
+    
+    def __init__(self, name, values):
+        set_value = object.__setattr__
+        set_value(self, "name", name)
+        for key in DIFFICULTY_FIELDS:
+            set_value(self, key, values[key])
+
+class GameConfig(Frozen):
+    """Validated settings values, with a profile per difficulty"""
+    __slots__ = tuple(FIELDS) + ("difficulty_profiles",)
+    
+    def __init__(self, values):
+        # Every problem is collected, so one report lists all there is to fix
+        set_value = object.__setattr__
+        errors = []
+        unknown = set(values) - set(FIELDS)
+        if unknown:
+            errors.append(f"unknown settings: {', '.join(sorted(unknown))}")
+        valid = set()
+        for name, check in FIELDS.items():
+            try:
+                set_value(self, name, check(values[name]))
+            except ValueError as e:
+                errors.extend(f"{name} {message}" for message in e.args)
+            else:
+                valid.add(name)
+        if ({"difficulty", "difficulty_settings"} <= valid
+                and self.difficulty not in self.difficulty_settings):
+            errors.append(f"difficulty must be one of {', '.join(self.difficulty_settings)}")
+        if errors:
+            raise ConfigError("; ".join(errors))
+        
+        set_value(self, "difficulty_profiles", MappingProxyType(
+            {name: DifficultyProfile(name, entry) for name, entry in self.difficulty_settings.items()}))
+    
+    @classmethod
+    def from_settings(cls, settings):
+        """Snapshot the config fields of a Settings object"""
+        return cls({name: getattr(settings, name) for name in FIELDS})
+    
+    def as_dict(self):
+        """Field values by name"""
+        return {name: getattr(self, name) for name in FIELDS}
+    
+    def replace(self, **changes):
+        """A new config with some fields changed (and validated)"""
+        return GameConfig(dict(self.as_dict(), **changes))
+    
+    def changed(self, other):
+        """Names of the fields whose values differ from another config's"""
+        return {name for name in FIELDS if getattr(self, name) != getattr(other, name)}
+
+def read_config_file(path):
+    """The settings table in a .toml or .json file"""
+    try:
+        if path.endswith(".toml"):
+            if tomllib is None:
+                raise ConfigError(f"{path}: TOML configs need Python 3.11 or later - use JSON")
+            with open(path, "rb") as f:
+                data = tomllib.load(f)
+        else:
+            with open(path) as f:
+                data = json.load(f)
+    except (OSError, ValueError) as e:
+        # tomllib.TOMLDecodeError and json.JSONDecodeError are both ValueErrors
+        raise ConfigError(f"{path}: {e}") from e
+    
+    if not isinstance(data, dict):
+        raise ConfigError(f"{path}: expected a table of settings")
+    return data
+
+def load_config(path, base):
+    """Apply a config file on top of a base config - only the values it lists change"""
+    data = read_config_file(path)
+    
+    # Difficulty tables are merged entry by entry, so a file can adjust a single value
+    if isinstance(data.get("difficulty_settings"), dict):
+        merged = {name: dict(entry) for name, entry in base.difficulty_settings.items()}
+        for name, entry in data["difficulty_settings"].items():
+            merged[name] = dict(merged.get(name, {}), **entry) if isinstance(entry, dict) else entry
+        data["difficulty_settings"] = merged
+    
+    try:
+        return GameConfig(dict(base.as_dict(), **data))
+    except ConfigError as e:
+        raise ConfigError(f"{path}: {e}") from e
+
+class ConfigWatcher:
+    """Notices when a config file is saved and loads it again"""
+    def __init__(self, path, interval=1.0):
+        self.path = path
+        self.interval = interval  # Seconds between checks - a stat call each
+        self.next_check = time.monotonic() + interval
+        self.signature = self.file_signature()
+    
+    def file_signature(self):
+        """Modification time and size, or None if the file doesn't exist"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def poll(self, base):
+        """A config reloaded on top of base if the file changed since the last call, else None
+        Raises ConfigError for a changed file that doesn't load; it's only retried once saved again"""
+        now = time.monotonic()
+        if now < self.next_check:
+            return None
+        self.next_check = now + self.interval
+        
+        signature = self.file_signature()
+        if signature == self.signature or signature is None:
+            return None
+        self.signature = signature
+        return load_config(self.path, base) 
\ No newline at end of file
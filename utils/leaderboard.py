@@ -0,0 +1,92 @@
+"""
+Leaderboard - ranks and percentiles over every recorded score, overall, per difficulty and per player
+"""
+
+import bisect
+import math
+
+class RankedScores:
+    """Scores kept sorted best first, so rank and percentile are binary searches"""
+    def __init__(self, records, orders=()):
+        # All records, shared between rankings and indexed by the order they were added in
+        self.records = records
+        
+        # (-score, order) - order keeps earlier games ahead among equal scores
+        self.keys = sorted((-records[order][0], order) for order in orders)
+    
+    def __len__(self):
+        return len(self.keys)
+    
+    def add(self, order):
+        """Insert the record added at an order"""
+        bisect.insort(self.keys, (-self.records[order][0], order))
+    
+    def rank(self, score):
+        """Place a score would take (1 = best); it shares the place of equal scores"""
+        return bisect.bisect_left(self.keys, (-score,)) + 1
+    
+    def percentile(self, score):
+        """Percentage of recorded scores strictly below a score"""
+        if not self.keys:
+            return 100.0
+        below = len(self.keys) - bisect.bisect_right(self.keys, (-score, math.inf))
+        return below * 100.0 / len(self.keys)
+    
+    def top(self, count):
+        """The best count records"""
+        return [self.records[order] for _, order in self.keys[:count]]
+
+class Leaderboard:
+    """Order statistics for all scores, with separate rankings per difficulty and per player"""
+    def __init__(self, records=()):
+        # (score, player, date, difficulty) records in the order they were added
+        self.records = list(records)
+        
+        # Loading history: group the records, then sort each ranking once
+        difficulties, players = {}, {}
+        for order, (_, player, _, difficulty) in enumerate(self.records):
+            players.setdefault(player, []).append(order)
+            if difficulty is not None:
+                difficulties.setdefault(difficulty, []).append(order)
+        
+        self.overall = RankedScores(self.records, range(len(self.records)))
+        self.difficulties = {name: RankedScores(self.records, orders) for name, orders in difficulties.items()}
+        self.players = {name: RankedScores(self.records, orders) for name, orders in players.items()}
+    
+    def __len__(self):
+        return len(self.records)
+    
+    def add(self, record):
+        """Add a (score, player, date, difficulty) record to every ranking it belongs to"""
+        _, player, _, difficulty = record
+        order = len(self.records)
+        self.records.append(record)
+        
+        self.overall.add(order)
+        if player not in self.players:
+            self.players[player] = RankedScores(self.records)
+        self.players[player].add(order)
+        if difficulty is not None:
+            if difficulty not in self.difficulties:
+                self.difficulties[difficulty] = RankedScores(self.records)
+            self.difficulties[difficulty].add(order)
+    
+    def ranking(self, difficulty=None, player=None):
+        """The scores for one difficulty or one player, or all of them"""
+        if difficulty is not None:
+            return self.difficulties.get(difficulty) or RankedScores(self.records)
+        if player is not None:
+            return self.players.get(player) or RankedScores(self.records)
+        return self.overall
+    
+    def rank(self, score, difficulty=None, player=None):
+        """Place a score would take among recorded games (1 = best)"""
+        return self.ranking(difficulty, player).rank(score)
+    
+    def percentile(self, score, difficulty=None, player=None):
+        """Percentage of recorded games that scored less"""
+        return self.ranking(difficulty, player).percentile(score)
+    
+    def top(self, count, difficulty=None, player=None):
+        """The best count (score, player, date, difficulty) records"""
+        return self.ranking(difficulty, player).top(count) 
\ No newline at end of file
@@ -0,0 +1,212 @@
+"""
+Leaderboard client - submits finished games to a leaderboard server and asks it for global ranks
+
+Submissions go to an offline queue file first and a background thread sends them in batches,
+so games played while the server is down are delivered once it is back.
+"""
+
+import base64
+import json
+import os
+import socket
+import threading
+import time
+
+class LeaderboardClientError(Exception):
+    """Raised when the leaderboard server can't be reached or rejects a request"""
+
+class ConnectionPool:
+    """Reusable connections to one server, shared between threads"""
+    def __init__(self, host, port, size=2, timeout=5.0):
+        self.address = (host, port)
+        self.size = size
+        self.timeout = timeout
+        self.idle = []
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """An idle connection, or a new one - (socket, file for reading replies)"""
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+        connection = socket.create_connection(self.address, self.timeout)
+        return connection, connection.makefile("rb")
+    
+    def release(self, connection):
+        """Hand a healthy connection back for reuse"""
+        with self.lock:
+            if len(self.idle) < self.size:
+                self.idle.append(connection)
+                return
+        self.discard(connection)
+    
+    def discard(self, connection):
+        """Close a connection that failed or isn't needed"""
+        sock, reader = connection
+        reader.close()
+        sock.close()
+    
+    def close(self):
+        """Close every idle connection"""
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for connection in idle:
+            self.discard(connection)
+
+class LeaderboardClient:
+    """Pooled, retrying client for a leaderboard server, with an offline queue for submissions
+    
+    Rejected submissions and delivery problems go to on_error(error, games), called on the
+    sending thread."""
+    def __init__(self, host, port, queue_path, on_error=None, pool_size=2, timeout=5.0,
+                 retries=3, batch_size=20, max_backoff=60.0):
+        self.pool = ConnectionPool(host, port, pool_size, timeout)
+        self.retries = retries
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.on_error = on_error or self.report_error
+        self.request_ids = iter(range(1, 2**63)).__next__
+        
+        # Games not yet acknowledged by the server, mirrored to the queue file
+        self.queue_path = queue_path
+        self.queue = self.load_queue()
+        self.queue_lock = threading.Lock()
+        self.sent = threading.Condition(self.queue_lock)  # Notified as the queue shrinks
+        self.wake = threading.Event()
+        self.closed = False
+        
+        self.thread = threading.Thread(target=self.run, name="leaderboard-client", daemon=True)
+        self.thread.start()
+        if self.queue:
+            self.wake.set()
+    
+    def request(self, message):
+        """Send a request and return its reply, retrying on a fresh connection if one fails"""
+        message = dict(message, id=self.request_ids())
+        data = json.dumps(message).encode() + b"\n"
+        
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(0.1 * 2 ** (attempt - 1))
+            try:
+                connection = self.pool.acquire()
+            except OSError as e:
+                error = e
+                continue
+            try:
+                sock, reader = connection
+                sock.sendall(data)
+                line = reader.readline()
+                if not line:
+                    raise ConnectionError("connection closed by the server")
+                reply = json.loads(line)
+            except (OSError, ValueError) as e:
+                # Stale pooled connections land here too, e.g. after a server restart
+                self.pool.discard(connection)
+                error = e
+                continue
+            self.pool.release(connection)
+            
+            if "error" in reply:
+                raise LeaderboardClientError(reply["error"])
+            return reply
+        
+        raise LeaderboardClientError(f"leaderboard server unreachable: {error}")
+    
+    def top(self, count=10, difficulty=None, player=None):
+        """The best (score, player, date, difficulty) records on the server"""
+        reply = self.request({"op": "top", "count": count, "difficulty": difficulty, "player": player})
+        return [tuple(record) for record in reply["top"]]
+    
+    def rank(self, score, difficulty=None, player=None):
+        """(rank, games, percentile) a score would have on the server"""
+        reply = self.request({"op": "rank", "score": score, "difficulty": difficulty, "player": player})
+        return reply["rank"], reply["games"], reply["percentile"]
+    
+    def submit(self, player, date, replay_data):
+        """Queue a finished game's replay for sending - returns at once, the sending thread saves it"""
+        game = {"player": player, "date": date, "replay": base64.b64encode(replay_data).decode("ascii")}
+        with self.queue_lock:
+            self.queue.append(game)
+        self.wake.set()
+    
+    def flush(self, timeout=None):
+        """Wait until the queue is empty - False if the server couldn't take it all within timeout"""
+        self.wake.set()
+        with self.sent:
+            return self.sent.wait_for(lambda: not self.queue, timeout)
+    
+    def run(self):
+        """Send queued games in batches, backing off while the server is unreachable"""
+        backoff = 1.0
+        while not self.closed:
+            self.wake.wait(backoff if self.queue else None)
+            self.wake.clear()
+            
+            # Save new games before trying the network, so they survive the game closing
+            with self.queue_lock:
+                self.write_queue_file()
+            
+            while self.queue and not self.closed:
+                batch = self.queue[:self.batch_size]
+                try:
+                    reply = self.request({"op": "submit", "games": batch})
+                except LeaderboardClientError as e:
+                    # Keep the games and try again later, reporting only the first failure of a streak
+                    if backoff == 1.0:
+                        self.on_error(e, batch)
+                    backoff = min(backoff * 2, self.max_backoff)
+                    break
+                backoff = 1.0
+                
+                rejected = [(game, result["error"]) for game, result in zip(batch, reply["results"])
+                            if not result["accepted"]]
+                for game, reason in rejected:
+                    self.on_error(LeaderboardClientError(f"game rejected: {reason}"), [game])
+                
+                # Accepted or rejected, the server has seen these games - resending won't change that
+                with self.queue_lock:
+                    del self.queue[:len(batch)]
+                    self.write_queue_file()
+                    self.sent.notify_all()
+    
+    def load_queue(self):
+        """Games left over from earlier runs, skipping a line cut short by a crash"""
+        games = []
+        if not os.path.exists(self.queue_path):
+            return games
+        with open(self.queue_path) as f:
+            for line in f:
+                try:
+                    games.append(json.loads(line))
+                except ValueError:
+                    continue
+        return games
+    
+    def write_queue_file(self):
+        """Rewrite the queue file with the games still waiting - through a temp file"""
+        if not self.queue:
+            if os.path.exists(self.queue_path):
+                os.remove(self.queue_path)
+            return
+        temp_path = f"{self.queue_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            f.writelines(json.dumps(game) + "\n" for game in self.queue)
+        os.replace(temp_path, self.queue_path)
+    
+    def close(self, timeout=None):
+        """Try to deliver what is queued, then stop - anything left stays in the queue file
+        The timeout covers both, so closing never takes much longer than it"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.flush(timeout)
+        self.closed = True
+        self.wake.set()
+        self.thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        self.pool.close()
+        with self.queue_lock:
+            self.write_queue_file()
+    
+    @staticmethod
+    def report_error(error, games):
+        """Default problem report"""
+        print(f"Leaderboard: {error} ({len(games)} game(s))") 
\ No newline at end of file
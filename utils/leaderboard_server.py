@@ -0,0 +1,232 @@
+"""
+Leaderboard server - a shared leaderboard for several cabinets, accepting only games it can replay
+
+Speaks JSON lines over TCP; every request carries an "id" that its reply echoes:
+    {"id": 1, "op": "submit", "games": [{"player": "Ann", "date": "2025-01-01", "replay": "<base64>"}]}
+        -> {"id": 1, "results": [{"accepted": true, "score": 120, "rank": 4}, {"accepted": false, "error": "..."}]}
+    {"id": 2, "op": "top", "count": 10, "difficulty": "NORMAL"}
+        -> {"id": 2, "top": [[120, "Ann", "2025-01-01", "NORMAL"], ...]}
+    {"id": 3, "op": "rank", "score": 100, "difficulty": "NORMAL"}
+        -> {"id": 3, "rank": 5, "games": 40, "percentile": 87.5}
+
+    python -m utils.leaderboard_server --port 8765 --scores leaderboard.db
+"""
+
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from utils.leaderboard import Leaderboard
+from utils.score_store import ScoreStoreError, open_score_store
+
+DEFAULT_PORT = 8765
+
+# Longest accepted request line - a replay of several hours is still far below this
+MAX_LINE = 4 * 1024 * 1024
+
+def verify_replay(data, max_ticks):
+    """Play a submitted replay headless with the standard settings for its difficulty
+    Returns (score, difficulty); raises ReplayError if it doesn't reproduce its recorded result"""
+    from game.replay import GAMEPLAY_SETTINGS, Replay, ReplayError
+    
+    replay = Replay.from_bytes(data)
+    if replay.final_tick > max_ticks:
+        raise ReplayError(f"replay longer than {max_ticks} ticks")
+    
+    # Only games played by the standard rules are comparable
+    difficulty = replay.settings.get("difficulty")
+    settings = Replay.standard_settings(difficulty)
+    standard = {name: getattr(settings, name) for name in GAMEPLAY_SETTINGS}
+    if replay.settings != standard:
+        changed = sorted(name for name in standard if replay.settings.get(name) != standard[name])
+        raise ReplayError(f"not played with the standard settings ({', '.join(changed)})")
+    
+    if not replay.verify(settings):
+        raise ReplayError("replay doesn't reproduce its recorded score")
+    return replay.score, difficulty
+
+class LeaderboardServer:
+    """Global leaderboard kept in a score store, ranked in memory, fed by verified replays"""
+    def __init__(self, store, replay_dir, workers=None, max_ticks=1_000_000):
+        self.store = store
+        self.leaderboard = Leaderboard(store.records())
+        self.max_ticks = max_ticks
+        
+        # Accepted replays are kept canonically encoded and named by seed - proof of each score
+        # (stored before its replay is), and a way to tell a resubmitted game from another game
+        # on a seed that was already used
+        self.replay_dir = replay_dir
+        os.makedirs(replay_dir, exist_ok=True)
+        self.accepted = set()
+        for name in os.listdir(replay_dir):
+            if not name.endswith(".replay"):
+                continue  # Includes temp files left by a crash mid-write
+            try:
+                self.accepted.add(int(name.removesuffix(".replay"), 16))
+            except ValueError:
+                continue
+        self.pending = {}  # Seed -> (canonical bytes, verification task)
+        
+        # Replays are checked in worker processes so the event loop keeps answering; spawned
+        # rather than forked, so no worker inherits the listening socket and outlives the server
+        self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        # Accepted games are saved one at a time, off the event loop
+        self.saver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="leaderboard-save")
+    
+    async def handle_connection(self, reader, writer):
+        """Answer requests on one connection until the client hangs up"""
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    break  # Longer than MAX_LINE
+                if not line:
+                    break
+                
+                request = {}
+                try:
+                    request = json.loads(line)
+                    reply = await self.handle_request(request)
+                except (ValueError, TypeError, KeyError) as e:
+                    reply = {"error": f"bad request: {e}"}
+                except ScoreStoreError as e:
+                    # A request-level error, so the client keeps the games and sends them again later
+                    reply = {"error": f"can't record games: {e}"}
+                reply["id"] = request.get("id") if isinstance(request, dict) else None
+                
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass  # The client went away mid-reply
+        finally:
+            writer.close()
+    
+    async def handle_request(self, request):
+        """Reply to one decoded request"""
+        op = request["op"]
+        if op == "submit":
+            results = await asyncio.gather(*(self.submit(game) for game in request["games"]))
+            return {"results": list(results)}
+        if op == "top":
+            top = self.leaderboard.top(int(request.get("count", 10)), request.get("difficulty"),
+                                       request.get("player"))
+            return {"top": [list(record) for record in top]}
+        if op == "rank":
+            ranking = self.leaderboard.ranking(request.get("difficulty"), request.get("player"))
+            score = int(request["score"])
+            return {"rank": ranking.rank(score), "games": len(ranking), "percentile": ranking.percentile(score)}
+        return {"error": f"unknown op {op!r}"}
+    
+    async def submit(self, game):
+        """Verify one submitted game and record it - resubmitting an accepted game is harmless,
+        but each seed counts once"""
+        from game.replay import Replay, ReplayError
+        
+        try:
+            replay = Replay.from_bytes(base64.b64decode(game["replay"], validate=True))
+            player, date = str(game["player"]), str(game["date"])
+        except (KeyError, TypeError, binascii.Error, ReplayError) as e:
+            return {"accepted": False, "error": f"bad submission: {e}"}
+        
+        # Judge the game, not its bytes - re-encoded settings, padded varints or inputs past
+        # the end make different bytes for the same game
+        data = replay.canonical().to_bytes()
+        seed = replay.seed
+        
+        if seed in self.accepted:
+            with open(self.replay_path(seed), "rb") as f:
+                if f.read() == data:
+                    return {"accepted": True, "duplicate": True}
+            return {"accepted": False, "error": "seed already used by another game"}
+        
+        # A retry can arrive while the first attempt is still being verified
+        if seed in self.pending:
+            pending_data, task = self.pending[seed]
+            if pending_data != data:
+                return {"accepted": False, "error": "seed already used by another game"}
+        else:
+            task = asyncio.ensure_future(self.verify(data, seed, player, date))
+            self.pending[seed] = (data, task)
+        return await asyncio.shield(task)
+    
+    def replay_path(self, seed):
+        """Where the accepted replay for a seed is kept"""
+        return os.path.join(self.replay_dir, f"{seed:016x}.replay")
+    
+    async def verify(self, data, seed, player, date):
+        """Replay a game in the pool and record it if it checks out"""
+        from game.replay import ReplayError
+        
+        loop = asyncio.get_running_loop()
+        try:
+            try:
+                score, difficulty = await loop.run_in_executor(self.pool, verify_replay, data, self.max_ticks)
+            except Exception as e:
+                # Untrusted bytes can fail in many ways - every one of them is a rejection
+                reason = str(e) if isinstance(e, ReplayError) else f"unreadable replay ({type(e).__name__})"
+                return {"accepted": False, "error": reason}
+            
+            # Still pending while saving, so a retry waits for this save instead of starting another
+            record = (score, player, date, difficulty)
+            await loop.run_in_executor(self.saver, self.save, record, seed, data)
+        finally:
+            del self.pending[seed]
+        
+        self.accepted.add(seed)
+        self.leaderboard.add(record)
+        return {"accepted": True, "score": score, "rank": self.leaderboard.rank(score, difficulty)}
+    
+    def save(self, record, seed, data):
+        """Store a verified game's score, then its replay - through a synced temp file, so a crash
+        leaves either no replay (and the resent game is accepted again) or the whole of it"""
+        self.store.add(*record)
+        path = self.replay_path(seed)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    
+    async def serve(self, host, port):
+        """Accept connections until cancelled (SIGTERM cancels too, so close() still runs)"""
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_LINE)
+        print(f"Leaderboard of {len(self.leaderboard)} games on {host}:{port}", flush=True)
+        async with server:
+            await server.serve_forever()
+    
+    def close(self):
+        """Stop the replay workers, finish saving accepted games and close the store"""
+        self.pool.shutdown()
+        self.saver.shutdown()
+        self.store.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared leaderboard server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--scores", default="leaderboard.db", help="score store for the global leaderboard")
+    parser.add_argument("--score-backend", default="sqlite", choices=("sqlite", "log"))
+    parser.add_argument("--replays", default="leaderboard_replays", help="directory for accepted replays")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="replay verification processes")
+    parser.add_argument("--max-ticks", type=int, default=1_000_000, help="longest game accepted")
+    args = parser.parse_args()
+    
+    server = LeaderboardServer(open_score_store(args.score_backend, args.scores), args.replays,
+                               args.workers, args.max_ticks)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    finally:
+        server.close()
+
+if __name__ == "__main__":
+    main() 
\ No newline at end of file
@@ -0,0 +1,166 @@
+"""
+Frame profiler - per-stage frame timings for the debug overlay and for export
+
+Stages are timed by wrapping the methods that make up a frame, so a game started
+without profiling calls the original methods and pays nothing.
+"""
+
+import csv
+import gc
+import json
+import statistics
+import sys
+import time
+from collections import deque
+
+def percentile(values, fraction):
+    """Value at a fraction of the way through sorted values (nearest rank)"""
+    index = min(len(values) - 1, int(fraction * len(values)))
+    return values[index]
+
+def describe(values):
+    """Mean, median, 95th percentile and max of a list of numbers"""
+    ordered = sorted(values)
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": percentile(ordered, 0.5),
+        "p95": percentile(ordered, 0.95),
+        "max": ordered[-1],
+    }
+
+class FrameProfiler:
+    """Collects how long each stage of each frame took, plus per-frame counters"""
+    enabled = True
+    
+    def __init__(self, history=3600):
+        # Finished frames, oldest first: (frame ms, {stage: ms}, {counter: value})
+        self.frames = deque(maxlen=history)
+        
+        # Every stage and counter seen so far, in first-seen order (the export columns)
+        self.stages = {}
+        self.counters = {}
+        
+        # The frame being measured
+        self.frame_start = None
+        self.stage_times = {}
+        self.counter_values = {}
+        
+        # Baselines for the allocation and garbage collection counters
+        self.allocated_blocks = 0
+        self.collections = 0
+    
+    def begin_frame(self):
+        """Start timing a frame"""
+        self.frame_start = time.perf_counter()
+        self.stage_times = {}
+        self.counter_values = {}
+        self.allocated_blocks = sys.getallocatedblocks()
+        self.collections = sum(stats["collections"] for stats in gc.get_stats())
+    
+    def end_frame(self):
+        """Finish the frame and add it to the history"""
+        if self.frame_start is None:
+            return
+        frame_ms = (time.perf_counter() - self.frame_start) * 1000
+        self.frame_start = None
+        
+        # Net memory blocks the frame left allocated, and collections it triggered
+        self.count("allocated blocks", sys.getallocatedblocks() - self.allocated_blocks)
+        self.count("gc collections", sum(stats["collections"] for stats in gc.get_stats()) - self.collections)
+        
+        self.frames.append((frame_ms, self.stage_times, self.counter_values))
+    
+    def add(self, stage, ms):
+        """Add time spent in a stage to the current frame (stages can run several times a frame)"""
+        times = self.stage_times
+        times[stage] = times.get(stage, 0.0) + ms
+        self.stages.setdefault(stage, None)
+    
+    def count(self, counter, value):
+        """Record a counter for the current frame, e.g. how many particles are alive"""
+        self.counter_values[counter] = value
+        self.counters.setdefault(counter, None)
+    
+    def timed(self, stage, function):
+        """Wrap a function so each call adds to a stage"""
+        perf_counter = time.perf_counter
+        
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add(stage, (perf_counter() - start) * 1000)
+        
+        return wrapper
+    
+    def instrument(self, obj, methods, prefix=""):
+        """Time methods of an object as stages named prefix + method name"""
+        for name in methods:
+            setattr(obj, name, self.timed(prefix + name, getattr(obj, name)))
+    
+    def summary(self, last=None):
+        """Frame, stage and counter statistics over the history or its last frames"""
+        frames = list(self.frames)[-last:] if last else list(self.frames)
+        if not frames:
+            return None
+        
+        frame_times = [frame_ms for frame_ms, _, _ in frames]
+        total_ms = sum(frame_times)
+        return {
+            "frames": len(frames),
+            "fps": len(frames) * 1000 / total_ms if total_ms else 0.0,
+            "frame_ms": describe(frame_times),
+            # Frames without a stage count as 0 ms, so means add up to the frame time
+            "stages": {stage: describe([times.get(stage, 0.0) for _, times, _ in frames])
+                       for stage in self.stages},
+            "counters": {counter: describe([values.get(counter, 0) for _, _, values in frames])
+                         for counter in self.counters},
+        }
+    
+    def export(self, path):
+        """Write the history to a .csv (one row per frame) or .json (summary and frames) file"""
+        if path.endswith(".csv"):
+            self.export_csv(path)
+        else:
+            self.export_json(path)
+    
+    def export_csv(self, path):
+        """Write one row per frame: frame time, then every stage and counter"""
+        stages, counters = list(self.stages), list(self.counters)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "frame_ms"] + stages + counters)
+            for number, (frame_ms, times, values) in enumerate(self.frames):
+                writer.writerow([number, round(frame_ms, 4)]
+                                + [round(times.get(stage, 0.0), 4) for stage in stages]
+                                + [values.get(counter, 0) for counter in counters])
+    
+    def export_json(self, path):
+        """Write the summary together with every frame's stage times and counters"""
+        data = {
+            "summary": self.summary(),
+            "frames": [{"frame_ms": frame_ms, "stages": times, "counters": values}
+                       for frame_ms, times, values in self.frames],
+        }
+        with open(path, "w") as f:
+            json.dump(data, f, indent=1)
+
+class NullProfiler:
+    """Stands in for FrameProfiler when profiling is off - instruments nothing, records nothing"""
+    enabled = False
+    
+    def begin_frame(self):
+        pass
+    
+    def end_frame(self):
+        pass
+    
+    def count(self, counter, value):
+        pass
+    
+    def timed(self, stage, function):
+        return function
+    
+    def instrument(self, obj, methods, prefix=""):
+        pass 
\ No newline at end of file
@@ -0,0 +1,169 @@
+"""
+Score stores - every finished game's score, kept safe from crashes part way through a write
+
+Records are (score, player, date, difficulty) tuples. Two backends share one interface:
+SQLite in WAL mode (the default) and an append-only JSON-lines log.
+"""
+
+import heapq
+import json
+import os
+import sqlite3
+import time
+
+class ScoreStoreError(Exception):
+    """Raised when a score store can't be opened or written"""
+
+class SQLiteScoreStore:
+    """Scores in an SQLite table - each write is a transaction, so a crash never leaves half a row"""
+    def __init__(self, path):
+        self.path = path
+        try:
+            # Autocommit mode - transactions are opened explicitly around each write
+            self.connection = sqlite3.connect(path, timeout=30, isolation_level=None,
+                                              check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            # With WAL, NORMAL sync can lose the last commits on power loss but never corrupts
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS scores (
+                    id INTEGER PRIMARY KEY,
+                    score INTEGER NOT NULL,
+                    player TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    difficulty TEXT
+                );
+                CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC, id);
+                CREATE INDEX IF NOT EXISTS scores_by_date ON scores (date);
+            """)
+        except sqlite3.DatabaseError as e:
+            raise ScoreStoreError(f"can't open score database {path}: {e}") from e
+    
+    def add(self, score, player, date, difficulty=None):
+        """Store one score"""
+        self.add_many([(score, player, date, difficulty)])
+    
+    def add_many(self, records):
+        """Store many scores in a single transaction - far faster than one at a time"""
+        try:
+            with self.connection:
+                self.connection.execute("BEGIN IMMEDIATE")
+                self.connection.executemany(
+                    "INSERT INTO scores (score, player, date, difficulty) VALUES (?, ?, ?, ?)", records
+                )
+        except sqlite3.DatabaseError as e:
+            raise ScoreStoreError(f"can't write scores to {self.path}: {e}") from e
+    
+    def top(self, count):
+        """The best count scores, earlier games first among equal scores"""
+        return self.connection.execute(
+            "SELECT score, player, date, difficulty FROM scores ORDER BY score DESC, id LIMIT ?", (count,)
+        ).fetchall()
+    
+    def records(self):
+        """Every score in the order it was added"""
+        return self.connection.execute("SELECT score, player, date, difficulty FROM scores ORDER BY id")
+    
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+    
+    def close(self):
+        """Close the database (checkpointing the WAL into it)"""
+        self.connection.close()
+
+class LogScoreStore:
+    """Scores appended to a JSON-lines file, one line per record
+    
+    Each write is a single write() on an O_APPEND descriptor, so several processes can share
+    the log without their lines interleaving. A crash can only cut the last line short; that
+    line is skipped on loading and compact() rewrites the file without it."""
+    def __init__(self, path):
+        self.path = path
+        self.scores = []
+        self.damaged = False
+        
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        score, player, date, difficulty = json.loads(line)
+                    except (ValueError, TypeError):
+                        self.damaged = True
+                        continue
+                    self.scores.append((score, player, date, difficulty))
+        
+        if self.damaged:
+            self.compact()
+        
+        try:
+            self.fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        except OSError as e:
+            raise ScoreStoreError(f"can't open score log {path}: {e}") from e
+    
+    def add(self, score, player, date, difficulty=None):
+        """Store one score"""
+        self.add_many([(score, player, date, difficulty)])
+    
+    def add_many(self, records):
+        """Append scores with a single write"""
+        records = [tuple(record) for record in records]
+        data = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+        try:
+            written = os.write(self.fd, data)
+        except OSError as e:
+            raise ScoreStoreError(f"can't write scores to {self.path}: {e}") from e
+        if written < len(data):
+            # Only happens when the disk fills up - the cut-off line is skipped on loading
+            raise ScoreStoreError(f"can't write scores to {self.path}: "
+                                  f"only {written} of {len(data)} bytes written")
+        self.scores.extend(records)
+    
+    def top(self, count):
+        """The best count scores, earlier games first among equal scores (ranking is the
+        leaderboard's job - this is a plain scan)"""
+        return heapq.nsmallest(count, self.scores, key=lambda record: -record[0])
+    
+    def records(self):
+        """Every score in the order it was added"""
+        return iter(self.scores)
+    
+    def __len__(self):
+        return len(self.scores)
+    
+    def compact(self):
+        """Rewrite the log with only its readable records - through a temp file, so it's never half written"""
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(record) + "\n" for record in self.scores)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self.damaged = False
+    
+    def close(self):
+        """Close the log file"""
+        os.close(self.fd)
+
+# Backends by settings name
+BACKENDS = {
+    "sqlite": SQLiteScoreStore,
+    "log": LogScoreStore,
+}
+
+def open_score_store(backend, path):
+    """Open a score store, setting aside an unreadable database instead of losing it"""
+    try:
+        return BACKENDS[backend](path)
+    except ScoreStoreError as e:
+        if not os.path.exists(path):
+            raise
+        
+        # Keep the damaged file for recovery and start a fresh store - SQLite's write-ahead log
+        # and shared-memory index go with it, as they belong to the old database
+        damaged_path = f"{path}.damaged-{time.strftime('%Y%m%d-%H%M%S')}"
+        os.replace(path, damaged_path)
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.replace(path + suffix, damaged_path + suffix)
+        print(f"Score store unreadable ({e}) - moved to {damaged_path}")
+        return BACKENDS[backend](path) 
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""
+Score writer - stores finished games on a background thread so the game loop never waits on disk
+"""
+
+import queue
+import threading
+from utils.score_store import ScoreStoreError
+
+# Queued in place of a record to stop the writer
+STOP = object()
+
+class ScoreWriter:
+    """Background thread that writes queued records to a score store
+    
+    Records queued while a write is in progress are coalesced into the next add_many call.
+    Once max_queued records are waiting, more are held in memory and join the next batch -
+    adding never blocks and never drops a score. Failed writes go to on_error(error, records),
+    called on the writer thread."""
+    def __init__(self, store, on_error=None, max_queued=1024):
+        self.store = store
+        self.on_error = on_error or self.report_error
+        self.queue = queue.Queue(max_queued)
+        self.overflow = []  # Records added while the queue was full
+        self.closed = False
+        # Held while queueing, so no record can be queued behind STOP and never written
+        self.lock = threading.Lock()
+        
+        self.thread = threading.Thread(target=self.run, name="score-writer", daemon=True)
+        self.thread.start()
+    
+    def add(self, score, player, date, difficulty=None):
+        """Queue one score without blocking"""
+        self.add_many([(score, player, date, difficulty)])
+    
+    def add_many(self, records):
+        """Queue scores without blocking - after close() they are reported and dropped"""
+        with self.lock:
+            if self.closed:
+                dropped = list(records)
+            else:
+                dropped = []
+                for record in records:
+                    try:
+                        self.queue.put_nowait(tuple(record))
+                    except queue.Full:
+                        # The queue is still full, so the writer has another batch to take these with
+                        self.overflow.append(tuple(record))
+        
+        # Reported outside the lock, so on_error can't deadlock by adding again
+        if dropped:
+            self.on_error(ScoreStoreError("score writer is closed"), dropped)
+    
+    def run(self):
+        """Write whatever is queued, one batch per wake-up, until stopped"""
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            done = len(batch)  # Queue entries this batch finishes, STOP included
+            
+            if STOP in batch:
+                stopping = True
+                batch = [record for record in batch if record is not STOP]
+            
+            # Records held back while the queue was full - taken before the batch is marked done,
+            # so flush() waits for them too
+            with self.lock:
+                batch.extend(self.overflow)
+                self.overflow = []
+            
+            if batch:
+                try:
+                    self.store.add_many(batch)
+                except Exception as e:
+                    # Anything escaping would kill the thread and leave flush() waiting forever
+                    self.on_error(e, batch)
+            
+            for _ in range(done):
+                self.queue.task_done()
+    
+    def flush(self):
+        """Wait until every queued score has been written (or reported as failed)"""
+        self.queue.join()
+    
+    def close(self, timeout=None):
+        """Write what is still queued and stop the thread - False if it didn't finish within timeout"""
+        with self.lock:
+            stopping = not self.closed
+            self.closed = True
+        if stopping:
+            try:
+                # Waits only if the queue is full, i.e. the disk is stuck anyway
+                self.queue.put(STOP, timeout=timeout)
+            except queue.Full:
+                return False
+        self.thread.join(timeout)
+        return not self.thread.is_alive()
+    
+    @staticmethod
+    def report_error(error, records):
+        """Default failure report"""
+        print(f"Couldn't save {len(records)} score(s): {error}") 
\ No newline at end of file
@@ -4,20 +4,56 @@ Scoreboard - manages score tracking and high scores
 
 import json
 import os
+import threading
 import time
+from utils.leaderboard import Leaderboard
+from utils.score_store import ScoreStoreError, open_score_store
+from utils.score_writer import ScoreWriter
+
+# Shown until the first game is recorded
+DEFAULT_HIGH_SCORES = [
+    (100, "Player1", "2023-01-01"),
+    (80, "Player2", "2023-01-02"),
+    (60, "Player3", "2023-01-03"),
+]
 
 class Scoreboard:
-    def __init__(self, settings):
+    def __init__(self, settings, on_error=None):
         self.settings = settings
         self.score = 0
-        self.high_scores = []
         self.max_high_scores = 10
         
-        # Score file path
-        self.score_file = "snake_high_scores.json"
+        # Every recorded score lives in the store; high_scores is its top few
+        self.store = open_score_store(settings.score_backend, settings.score_file)
+        self.import_legacy_scores(settings.legacy_score_file)
+        
+        # Ranked in memory, but only loaded when first needed (or by preload) - a long history
+        # takes a while and shouldn't hold up the first frame
+        self.ranked = None
+        self.ranked_lock = threading.RLock()
+        
+        # New scores are written by a background thread, or straight to the store when that's off;
+        # failures go to on_error(error, records)
+        self.on_error = on_error or ScoreWriter.report_error
+        if settings.background_score_writes:
+            self.writer = ScoreWriter(self.store, self.on_error)
+        else:
+            self.writer = self.store
         
-        # Load high scores
-        self.load_high_scores()
+        # Finished games also go to the shared leaderboard, which checks them by replaying them
+        self.client = None
+        if settings.leaderboard_server:
+            from utils.leaderboard_client import LeaderboardClient
+            from utils.leaderboard_server import DEFAULT_PORT
+            host, _, port = settings.leaderboard_server.rpartition(":")
+            if not host:
+                host, port = port, None
+            self.client = LeaderboardClient(host, int(port or DEFAULT_PORT), settings.leaderboard_queue_file,
+                                            self.on_error)
+        
+        # Rank of the score being played, recomputed only when the score changes
+        self.live_score = None
+        self.live_rank_info = None
     
     def add_points(self, points):
         """Add points to the current score"""
@@ -29,66 +65,108 @@ class Scoreboard:
     
     def check_high_score(self):
         """Check if current score is a high score"""
-        if not self.high_scores or self.score > min(score for score, _, _ in self.high_scores):
-            return True
-        return len(self.high_scores) < self.max_high_scores
+        return self.get_rank() is not None
     
-    def add_high_score(self, player_name="Player"):
-        """Add current score to high scores"""
+    def add_high_score(self, player_name="Player", replay=None):
+        """Add current score to high scores, submitting the game's replay to the shared leaderboard"""
         # Only store the date, not the time
         timestamp = time.strftime("%Y-%m-%d")
         
-        self.high_scores.append((self.score, player_name, timestamp))
-        
-        # Sort high scores in descending order
-        self.high_scores.sort(reverse=True, key=lambda x: x[0])
-        
-        # Trim to max high scores
-        self.high_scores = self.high_scores[:self.max_high_scores]
+        # The store keeps every score; the leaderboard ranks them in memory right away
+        # (loaded before the write, so the new record isn't read back from the store too)
+        leaderboard = self.leaderboard
+        record = (self.score, player_name, timestamp, self.settings.difficulty)
+        try:
+            self.writer.add(*record)
+        except ScoreStoreError as e:
+            self.on_error(e, [record])
+        leaderboard.add(record)
         
-        # Save high scores
-        self.save_high_scores()
+        if self.client and replay is not None:
+            self.client.submit(player_name, timestamp, replay.to_bytes())
+        self.live_score = None
     
     def get_rank(self):
         """Get the rank of the current score in the high scores"""
-        for i, (score, _, _) in enumerate(self.high_scores):
-            if self.score >= score:
-                return i + 1
-        
-        if len(self.high_scores) < self.max_high_scores:
-            return len(self.high_scores) + 1
+        rank = self.leaderboard.rank(self.score)
+        if rank <= self.max_high_scores:
+            return rank
         
         return None  # Not a high score
     
+    def get_percentile(self, difficulty=None, player=None):
+        """Percentage of recorded games, optionally of one difficulty or player, that scored less"""
+        return self.leaderboard.percentile(self.score, difficulty, player)
+    
+    def get_leaderboard(self, count=None, difficulty=None, player=None):
+        """Top (score, name, date) entries overall, for one difficulty or for one player"""
+        top = self.leaderboard.top(count or self.max_high_scores, difficulty, player)
+        return [(score, name, date) for score, name, date, _ in top]
+    
+    def live_rank(self):
+        """(rank, games, percentile) of the score being played among games at this difficulty,
+        or None before any were recorded - cheap enough to call every frame"""
+        if self.score != self.live_score:
+            self.live_score = self.score
+            difficulty = self.settings.difficulty
+            games = len(self.leaderboard.ranking(difficulty))
+            self.live_rank_info = (self.leaderboard.rank(self.score, difficulty), games,
+                                   self.leaderboard.percentile(self.score, difficulty)) if games else None
+        return self.live_rank_info
+    
+    @property
+    def leaderboard(self):
+        """Every recorded score, ranked - loaded from the store the first time it is needed"""
+        if self.ranked is None:
+            self.preload()
+        return self.ranked
+    
+    @property
+    def high_scores(self):
+        """The top recorded (score, name, date) entries, or placeholders before any were recorded"""
+        return self.get_leaderboard() or list(DEFAULT_HIGH_SCORES)
+    
     def load_high_scores(self):
-        """Load high scores from file"""
+        """Load every recorded score from the store and rank them"""
+        with self.ranked_lock:
+            self.ranked = Leaderboard(self.store.records())
+    
+    def preload(self):
+        """Load the leaderboard now, e.g. from a background thread, unless already loaded"""
+        with self.ranked_lock:
+            if self.ranked is None:
+                self.load_high_scores()
+    
+    def import_legacy_scores(self, path):
+        """Move scores from the old JSON high score file into an empty store, once"""
+        if len(self.store) or not path or not os.path.exists(path):
+            return
         try:
-            if os.path.exists(self.score_file):
-                with open(self.score_file, 'r') as f:
-                    self.high_scores = json.load(f)
-            else:
-                # Default high scores if file doesn't exist
-                self.high_scores = [
-                    (100, "Player1", "2023-01-01"),
-                    (80, "Player2", "2023-01-02"),
-                    (60, "Player3", "2023-01-03"),
-                ]
+            with open(path, 'r') as f:
+                scores = json.load(f)
         except (json.JSONDecodeError, IOError):
-            # Handle error by setting default high scores
-            self.high_scores = [
-                (100, "Player1", "2023-01-01"),
-                (80, "Player2", "2023-01-02"),
-                (60, "Player3", "2023-01-03"),
-            ]
-    
-    def save_high_scores(self):
-        """Save high scores to file"""
-        try:
-            with open(self.score_file, 'w') as f:
-                json.dump(self.high_scores, f)
-        except IOError:
-            # Handle error - maybe log or show message to user
-            pass
+            # The old file wasn't written atomically - nothing to rescue from a broken one
+            return
+        
+        self.store.add_many([(score, name, date, None) for score, name, date in scores])
+        os.replace(path, f"{path}.imported")
+    
+    def flush(self):
+        """Wait until every recorded score is in the store"""
+        if self.writer is not self.store:
+            self.writer.flush()
+    
+    def close(self):
+        """Write the scores still queued, then close the score store"""
+        if self.client:
+            # Whatever the server doesn't take in time is sent on the next run
+            self.client.close(self.settings.score_flush_timeout)
+        if self.writer is not self.store:
+            if not self.writer.close(self.settings.score_flush_timeout):
+                # Closing the store under a stuck write could lose it - leave the thread to finish or die
+                self.on_error(ScoreStoreError("timed out writing scores"), [])
+                return
+        self.store.close()
     
     def get_high_scores_formatted(self):
         """Get formatted high scores as a list of strings"""
@@ -2,23 +2,63 @@
 Game settings and configuration
 """
 
+import os
 import pygame
 # Import user configuration
 from utils.config import *
+from utils.game_config import ConfigError, GameConfig, load_config
 
 class Settings:
-    def __init__(self):
+    def __init__(self, debug_output=True):
+        # Debug settings - headless runs pass debug_output=False to keep stdout quiet
+        self.debug_output = debug_output
+        
+        # Config file (TOML or JSON) overriding the values below, re-read when it is saved
+        self.config_file = "snake_config.toml"
+        self.config_reload = True
+        
         # Screen settings
         self.screen_width = 800
         self.screen_height = 600
-        self.fps = 60
+        self.fps = 60  # Simulation ticks per second
+        self.max_render_fps = 60  # Frame cap (0 = uncapped) - doesn't change game speed
+        self.vsync = False
+        self.interpolate_movement = True  # Slide the snake between cells when rendering
+        self.dirty_rects = False  # Only repaint changed regions (lighter on slow machines)
+        
+        # Replays - each game's seed and inputs, verifiable with python -m game.replay
+        self.record_replays = False
+        self.replay_dir = "replays"
+        
+        # Profiling - per-stage frame timings shown with F3 (nothing is timed when off)
+        self.profiling = False
+        self.profile_history = 3600  # Frames kept for the overlay and export
+        self.profile_export = None   # .csv or .json file written when the game closes
+        
+        # Score history - "sqlite" (WAL database) or "log" (append-only JSON lines)
+        self.player_name = "Player"
+        self.score_backend = "sqlite"
+        self.score_file = "snake_scores.db"
+        self.legacy_score_file = "snake_high_scores.json"  # Imported into the store on first run
+        self.background_score_writes = True  # Write scores on a thread so frames never wait on disk
+        self.score_flush_timeout = 5.0       # Seconds to wait for queued scores when the game closes
+        
+        # Shared leaderboard - "host:port" of a python -m utils.leaderboard_server, or None to stay local
+        self.leaderboard_server = None
+        self.leaderboard_queue_file = "leaderboard_queue.jsonl"  # Games waiting to be sent
         
         # Grid settings
         self.grid_size = 20
+        self.bitboard_grid = False  # Also track the snake as a bitboard (for AI and analysis)
+        
+        # World size in cells - None fits the window; larger worlds scroll with the snake
+        self.world_width = None
+        self.world_height = None
         
         # Color settings
         self.bg_color = (15, 15, 20)
         self.grid_color = (30, 30, 40)
+        self.world_edge_color = (70, 70, 100)  # Where a scrolling world wraps around
         
         self.snake_head_color = (50, 200, 50)
         self.snake_body_color = (20, 140, 20)
@@ -67,24 +107,54 @@ class Settings:
         # Flag colors
         self.iran_flag_colors = IRAN_FLAG_COLORS
         
+        # Validated read-only snapshot of the values above; config files are applied on top of the defaults
+        self.default_config = self.config = GameConfig.from_settings(self)
+        
         # Apply difficulty settings - this MUST be done last
         self.apply_difficulty(self.difficulty)
     
     def apply_difficulty(self, difficulty):
         """Apply settings based on selected difficulty"""
-        if difficulty in self.difficulty_settings:
-            settings = self.difficulty_settings[difficulty]
+        if difficulty in self.config.difficulty_profiles:
+            profile = self.config.difficulty_profiles[difficulty]
             
             # Apply speed settings from difficulty
-            self.initial_snake_speed = settings["initial_snake_speed"]
-            self.max_snake_speed = settings["max_snake_speed"]
+            self.initial_snake_speed = profile.initial_snake_speed
+            self.max_snake_speed = profile.max_snake_speed
             
             # Apply appearance chances
-            self.mario_appearance_chance = settings.get("mario_appearance_chance", 0.05)
+            self.mario_appearance_chance = profile.mario_appearance_chance
             
-            print(f"Difficulty set to {difficulty}:")
-            print(f"  - Snake speed: {self.initial_snake_speed} (max: {self.max_snake_speed})")
-            print(f"  - Mario chance: {self.mario_appearance_chance}")
+            if self.debug_output:
+                print(f"Difficulty set to {difficulty}:")
+                print(f"  - Snake speed: {self.initial_snake_speed} (max: {self.max_snake_speed})")
+                print(f"  - Mario chance: {self.mario_appearance_chance}")
+    
+    def load_config_file(self):
+        """Apply the config file if there is one - a broken file is reported and the defaults kept"""
+        if not self.config_file or not os.path.exists(self.config_file):
+            return
+        try:
+            self.apply_config(load_config(self.config_file, self.default_config))
+        except ConfigError as e:
+            print(f"Config not loaded: {e}")
+    
+    def apply_config(self, config):
+        """Take the values that differ from the current config and return their names
+        (values only changed here, like the difficulty picked in the menu, are kept otherwise)"""
+        changed = config.changed(self.config)
+        for name in changed:
+            setattr(self, name, getattr(config, name))
+        self.config = config
+        
+        if changed & {"difficulty", "difficulty_settings"}:
+            self.apply_difficulty(self.difficulty)
+        return changed
+    
+    def grid_dimensions(self):
+        """Get the board size in cells"""
+        return (self.world_width or self.screen_width // self.grid_size,
+                self.world_height or self.screen_height // self.grid_size)
     
     def change_difficulty(self, new_difficulty):
         """Change difficulty during gameplay"""